@@ -0,0 +1,189 @@
+"""
+Exercise the outgoing send throttler against a local fake Bot API server.
+
+The fake server accepts sendMessage and enforces Telegram-like flood
+limits (per chat and overall), answering 429 with retry_after when they
+are exceeded. The driver runs a bulk broadcast to many chats while users
+keep getting interactive replies, and reports 429s, failed sends and
+latency per lane - with the throttler and, for comparison, without it.
+
+Usage:
+    python -m benchmarks.fake_bot_api --broadcast 300 --interactive 60
+    python -m benchmarks.fake_bot_api --no-throttle
+"""
+
+import argparse
+import asyncio
+import itertools
+import statistics
+import time
+from collections import defaultdict
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.exceptions import TelegramRetryAfter
+from aiohttp import web
+
+from src.outgoing import SendThrottler, bulk_sends
+
+TOKEN = "123456:fake"
+
+
+class FakeBotAPI:
+    """Minimal Bot API server with token bucket flood control."""
+
+    def __init__(self, global_rate: float, chat_rate: float, chat_burst: int) -> None:
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.global_bucket = (global_rate, time.monotonic())
+        self.chat_buckets: dict[int, tuple[float, float]] = {}
+        self.message_ids = itertools.count(1)
+        self.accepted = 0
+        self.rejected = 0
+
+    @staticmethod
+    def _take(bucket: tuple[float, float], rate: float, burst: float) -> tuple[tuple[float, float], float]:
+        tokens, updated = bucket
+        now = time.monotonic()
+        tokens = min(burst, tokens + (now - updated) * rate)
+        if tokens >= 1:
+            return (tokens - 1, now), 0.0
+        return (tokens, now), (1 - tokens) / rate
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        data = await request.post()
+        if method.lower() != "sendmessage":
+            return web.json_response({"ok": True, "result": True})
+
+        chat_id = int(data["chat_id"])
+        chat_bucket = self.chat_buckets.get(chat_id, (self.chat_burst, time.monotonic()))
+        chat_bucket, chat_wait = self._take(chat_bucket, self.chat_rate, self.chat_burst)
+        global_bucket, global_wait = self._take(self.global_bucket, self.global_rate, self.global_rate)
+        wait = max(chat_wait, global_wait)
+        if wait:
+            # Like Telegram, refuse without consuming anything
+            self.rejected += 1
+            return web.json_response(
+                {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {int(wait) + 1}",
+                    "parameters": {"retry_after": int(wait) + 1},
+                },
+                status=429,
+            )
+
+        self.chat_buckets[chat_id] = chat_bucket
+        self.global_bucket = global_bucket
+        self.accepted += 1
+        return web.json_response({
+            "ok": True,
+            "result": {
+                "message_id": next(self.message_ids),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": data.get("text", ""),
+            },
+        })
+
+
+async def start_server(api: FakeBotAPI, port: int) -> web.AppRunner:
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", api.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+async def timed_send(bot: Bot, chat_id: int, text: str, lane: str, results: dict) -> None:
+    started = time.monotonic()
+    try:
+        await bot.send_message(chat_id, text)
+    except TelegramRetryAfter:
+        results[f"{lane}_failed"] += 1
+        return
+    results[lane].append(time.monotonic() - started)
+
+
+async def run(args: argparse.Namespace) -> None:
+    api = FakeBotAPI(args.server_global_rate, args.server_chat_rate, args.server_chat_burst)
+    runner = await start_server(api, args.port)
+
+    session = AiohttpSession(api=TelegramAPIServer.from_base(f"http://127.0.0.1:{args.port}"))
+    if not args.no_throttle:
+        session.middleware(SendThrottler(
+            global_rate=args.global_rate,
+            chat_rate=args.chat_rate,
+            chat_burst=args.chat_burst,
+            retry_attempts=args.retries,
+        ))
+    bot = Bot(TOKEN, session=session)
+
+    results: dict = defaultdict(list)
+    results.update(bulk_failed=0, interactive_failed=0)
+
+    async def broadcast() -> None:
+        with bulk_sends():
+            await asyncio.gather(*(
+                timed_send(bot, 1_000_000 + n, "broadcast", "bulk", results)
+                for n in range(args.broadcast)
+            ))
+
+    async def interactive() -> None:
+        # A handful of users chatting while the broadcast runs
+        tasks = []
+        for n in range(args.interactive):
+            tasks.append(asyncio.create_task(
+                timed_send(bot, n % args.chats, "reply", "interactive", results)
+            ))
+            await asyncio.sleep(args.interactive_interval)
+        await asyncio.gather(*tasks)
+
+    started = time.monotonic()
+    try:
+        await asyncio.gather(broadcast(), interactive())
+    finally:
+        elapsed = time.monotonic() - started
+        await bot.session.close()
+        await runner.cleanup()
+
+    print(f"throttler: {'off' if args.no_throttle else 'on'}, {elapsed:.1f} s")
+    print(f"server: {api.accepted} accepted, {api.rejected} rejected with 429")
+    for lane in ("interactive", "bulk"):
+        timings = sorted(results[lane])
+        if timings:
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            print(
+                f"{lane:<12} sent {len(timings):>5}  failed {results[f'{lane}_failed']:>5}  "
+                f"p50 {statistics.median(timings) * 1000:8.1f} ms  p95 {p95 * 1000:8.1f} ms"
+            )
+        else:
+            print(f"{lane:<12} sent     0  failed {results[f'{lane}_failed']:>5}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--broadcast", type=int, default=300, help="bulk messages, one per chat")
+    parser.add_argument("--interactive", type=int, default=60, help="interactive replies")
+    parser.add_argument("--chats", type=int, default=20, help="chats receiving interactive replies")
+    parser.add_argument("--interactive-interval", type=float, default=0.1, help="seconds between replies")
+    parser.add_argument("--global-rate", type=float, default=30.0, help="throttler: messages/s overall")
+    parser.add_argument("--chat-rate", type=float, default=1.0, help="throttler: messages/s per chat")
+    parser.add_argument("--chat-burst", type=int, default=3, help="throttler: burst per chat")
+    parser.add_argument("--retries", type=int, default=3, help="throttler: retries after 429")
+    parser.add_argument("--server-global-rate", type=float, default=30.0)
+    parser.add_argument("--server-chat-rate", type=float, default=1.0)
+    parser.add_argument("--server-chat-burst", type=int, default=3)
+    parser.add_argument("--no-throttle", action="store_true", help="send without the throttler")
+    parser.add_argument("--port", type=int, default=8085)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(run(parse_args()))
@@ -0,0 +1,247 @@
+"""
+Populate the database with synthetic diaries for scaling benchmarks.
+
+Creates N users with a skewed number of dreams each (a few heavy diarists,
+many light ones), in English and Russian, with per-language tag
+vocabularies and dates spread over several years. Dreams are loaded with
+COPY, then tags are normalized and dream counters set in bulk, so the
+result looks exactly like data written by the bot.
+
+Usage (against a migrated development database):
+    python -m benchmarks.generate_data --users 1000 --dreams 100
+    python -m benchmarks.generate_data --reset   # remove generated users
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import time
+from collections.abc import Iterator
+from datetime import date, timedelta
+
+from sqlalchemy import delete, insert, text
+
+from src.database import engine
+from src.models import User
+
+# Generated users get Telegram IDs at or below this; real IDs are positive
+# and the load test uses the range just above it
+TELEGRAM_ID_BASE = -2_000_000
+
+# Users whose dreams are loaded and post-processed together
+USER_CHUNK = 200
+
+VOCABULARY = {
+    "en": {
+        "words": (
+            "house", "forest", "water", "ocean", "river", "city", "street", "school",
+            "exam", "train", "station", "mirror", "door", "stairs", "teeth", "dog",
+            "cat", "wolf", "bird", "mother", "father", "friend", "stranger", "night",
+            "sky", "moon", "fire", "storm", "road", "car", "bridge", "garden",
+            "flying", "falling", "running", "hiding", "searching", "swimming",
+            "dark", "bright", "old", "strange", "empty", "huge", "quiet", "endless",
+        ),
+        "titles": (
+            "Flying over the {}", "Lost in the {}", "The {} again", "Chased through the {}",
+            "A {} that talked", "Late for the {}", "Under the {}", "Back at the old {}",
+        ),
+        "tags": (
+            "lucid", "nightmare", "flying", "falling", "water", "family", "work",
+            "school", "recurring", "animals", "travel", "chase", "house", "vivid",
+            "colors", "music", "death", "love", "strange", "funny",
+        ),
+        "notes": ("Woke up at 4am", "Felt anxious all day", "Very vivid", "Remember only fragments", ""),
+    },
+    "ru": {
+        "words": (
+            "дом", "лес", "вода", "море", "река", "город", "улица", "школа",
+            "экзамен", "поезд", "вокзал", "зеркало", "дверь", "лестница", "зубы", "собака",
+            "кошка", "волк", "птица", "мама", "отец", "друг", "незнакомец", "ночь",
+            "небо", "луна", "огонь", "буря", "дорога", "машина", "мост", "сад",
+            "летал", "падал", "бежал", "прятался", "искал", "плыл",
+            "тёмный", "яркий", "старый", "странный", "пустой", "огромный", "тихий", "бесконечный",
+        ),
+        "titles": (
+            "Полёт над {}", "Потерялся: {}", "Снова {}", "Погоня: {}",
+            "Говорящий {}", "Опоздал: {}", "Под {}", "Старый {}",
+        ),
+        "tags": (
+            "осознанный", "кошмар", "полёт", "падение", "вода", "семья", "работа",
+            "школа", "повторяющийся", "животные", "путешествие", "погоня", "дом", "яркий",
+            "цвета", "музыка", "смерть", "любовь", "странный", "смешной",
+        ),
+        "notes": ("Проснулся в 4 утра", "Весь день тревожно", "Очень ярко", "Помню только обрывки", ""),
+    },
+}
+
+DREAM_COLUMNS = ["user_id", "title", "description", "tags", "notes", "dream_date"]
+
+
+def dreams_per_user(users: int, mean: float, skew: float, rng: random.Random) -> list[int]:
+    """
+    Draw diary sizes from a log-normal distribution with the given mean.
+
+    ``skew`` is the log-normal sigma: 0 gives every user ``mean`` dreams,
+    around 1.5 gives a long tail of heavy users.
+    """
+    mu = math.log(mean) - skew**2 / 2
+    return [max(1, round(rng.lognormvariate(mu, skew))) for _ in range(users)]
+
+
+def zipf_choices(items: tuple[str, ...], k: int, rng: random.Random) -> list[str]:
+    """Pick ``k`` distinct items, favouring the first ones (Zipf-like)."""
+    weights = [1 / (rank + 1) for rank in range(len(items))]
+    chosen: list[str] = []
+    while len(chosen) < min(k, len(items)):
+        item = rng.choices(items, weights)[0]
+        if item not in chosen:
+            chosen.append(item)
+    return chosen
+
+
+def generate_dreams(
+    user_id: int,
+    lang: str,
+    count: int,
+    years: int,
+    rng: random.Random,
+) -> Iterator[tuple]:
+    vocabulary = VOCABULARY[lang]
+    words = vocabulary["words"]
+    today = date.today()
+    # Each user has a personal tag habit: a few favourites plus occasional others
+    favourite_tags = zipf_choices(vocabulary["tags"], 5, rng)
+    for _ in range(count):
+        length = max(3, round(rng.lognormvariate(3.3, 0.7)))
+        tags = rng.sample(favourite_tags, rng.randint(0, 3))
+        if rng.random() < 0.2:
+            tags.append(rng.choice(vocabulary["tags"]))
+        yield (
+            user_id,
+            rng.choice(vocabulary["titles"]).format(rng.choice(words)),
+            " ".join(rng.choices(words, k=length)).capitalize() + ".",
+            ", ".join(dict.fromkeys(tags)),
+            rng.choice(vocabulary["notes"]),
+            today - timedelta(days=rng.randrange(years * 365)),
+        )
+
+
+NORMALIZE_TAGS = text(
+    """
+    WITH links AS (
+        SELECT DISTINCT d.id AS dream_id, d.user_id, lower(btrim(raw.tag)) AS name
+        FROM dreams AS d
+        CROSS JOIN LATERAL unnest(string_to_array(d.tags, ',')) AS raw(tag)
+        WHERE d.user_id = ANY(:user_ids) AND btrim(raw.tag) <> ''
+    ),
+    new_tags AS (
+        INSERT INTO tags (user_id, name)
+        SELECT DISTINCT user_id, name FROM links
+        ON CONFLICT DO NOTHING
+        RETURNING id, user_id, name
+    )
+    INSERT INTO dream_tags (dream_id, tag_id)
+    SELECT links.dream_id, new_tags.id
+    FROM links
+    JOIN new_tags ON new_tags.user_id = links.user_id AND new_tags.name = links.name
+    """
+)
+
+SET_DREAM_COUNTS = text(
+    """
+    UPDATE users SET dream_count = c.n
+    FROM (
+        SELECT user_id, count(*) AS n FROM dreams
+        WHERE user_id = ANY(:user_ids)
+        GROUP BY user_id
+    ) AS c
+    WHERE users.id = c.user_id
+    """
+)
+
+
+async def reset() -> None:
+    async with engine.begin() as conn:
+        result = await conn.execute(delete(User).where(User.telegram_id <= TELEGRAM_ID_BASE))
+    print(f"Removed {result.rowcount} generated users")
+
+
+async def generate(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    sizes = dreams_per_user(args.users, args.dreams, args.skew, rng)
+    languages = ["ru" if rng.random() < args.ru_share else "en" for _ in range(args.users)]
+
+    async with engine.connect() as conn:
+        first = (await conn.execute(
+            text("SELECT coalesce(min(telegram_id), :base + 1) FROM users WHERE telegram_id <= :base"),
+            {"base": TELEGRAM_ID_BASE},
+        )).scalar_one()
+    telegram_ids = [first - 1 - n for n in range(args.users)]
+
+    started = time.monotonic()
+    loaded = 0
+    for offset in range(0, args.users, USER_CHUNK):
+        chunk = range(offset, min(offset + USER_CHUNK, args.users))
+        async with engine.begin() as conn:
+            result = await conn.execute(
+                insert(User).returning(User.id, sort_by_parameter_order=True),
+                [{"telegram_id": telegram_ids[n], "language": languages[n]} for n in chunk],
+            )
+            user_ids = list(result.scalars().all())
+
+            records = (
+                record
+                for n, user_id in zip(chunk, user_ids)
+                for record in generate_dreams(user_id, languages[n], sizes[n], args.years, rng)
+            )
+            raw = await conn.get_raw_connection()
+            # COPY fires the search vector trigger just like regular inserts
+            await raw.driver_connection.copy_records_to_table(
+                "dreams", records=records, columns=DREAM_COLUMNS
+            )
+            await conn.execute(NORMALIZE_TAGS, {"user_ids": user_ids})
+            await conn.execute(SET_DREAM_COUNTS, {"user_ids": user_ids})
+
+        loaded += sum(sizes[n] for n in chunk)
+        elapsed = time.monotonic() - started
+        print(f"{chunk.stop}/{args.users} users, {loaded} dreams ({loaded / elapsed:.0f} dreams/s)")
+
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for table in ("users", "dreams", "tags", "dream_tags"):
+            await conn.execute(text(f"ANALYZE {table}"))
+
+    print(
+        f"Done in {time.monotonic() - started:.1f} s: {loaded} dreams, "
+        f"largest diary {max(sizes)}, median {sorted(sizes)[len(sizes) // 2]}"
+    )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--users", type=int, default=1000, help="users to create")
+    parser.add_argument("--dreams", type=float, default=100, help="mean dreams per user")
+    parser.add_argument("--skew", type=float, default=1.5, help="log-normal sigma of diary sizes (0 = equal)")
+    parser.add_argument("--ru-share", type=float, default=0.3, help="share of Russian-speaking users")
+    parser.add_argument("--years", type=int, default=5, help="how far back dream dates go")
+    parser.add_argument("--seed", type=int, default=1, help="random seed")
+    parser.add_argument("--reset", action="store_true", help="delete previously generated users and exit")
+    return parser.parse_args()
+
+
+async def main() -> None:
+    args = parse_args()
+    try:
+        if args.reset:
+            await reset()
+        else:
+            await generate(args)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
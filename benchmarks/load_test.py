@@ -0,0 +1,372 @@
+"""
+Replay synthetic Telegram updates against the real dispatcher.
+
+The Bot API is replaced by a local fake session, so no network access or
+bot token is needed; only a migrated PostgreSQL database (use a development
+one). Virtual users run weighted scenarios (new dream flow, list and
+pagination, search, export) concurrently, and latency percentiles and
+throughput are reported per step.
+
+Usage:
+    python -m benchmarks.load_test --users 100 --rounds 5 --output results.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import random
+import statistics
+import time
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.base import BaseSession
+from aiogram.enums import ParseMode
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.methods import TelegramMethod
+from aiogram.types import InlineKeyboardMarkup, Message, Update, User as TelegramUser
+from sqlalchemy import delete, insert
+
+from src.database import async_session, engine
+from src.main import create_dispatcher
+from src.models import Dream, User
+from src.write_queue import dream_writer
+
+# Benchmark users get Telegram IDs below this; real IDs are positive and
+# users from generate_data start at -2_000_000, so they are left alone
+TELEGRAM_ID_BASE = -1_000_000
+benchmark_users = User.telegram_id.between(TELEGRAM_ID_BASE - 999_999, TELEGRAM_ID_BASE)
+
+SCENARIO_WEIGHTS = {"new_dream": 2, "list": 4, "search": 2, "export": 1}
+
+WORDS = (
+    "flying", "water", "house", "forest", "falling", "teeth", "exam", "train",
+    "ocean", "stairs", "mirror", "dog", "city", "night", "school", "chase",
+)
+
+BOT_USER = TelegramUser(id=1, is_bot=True, first_name="Dream Diary", username="dream_diary_bot")
+
+
+class FakeSession(BaseSession):
+    """Bot API session that answers locally and records outgoing calls."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.message_ids = itertools.count(1)
+        self.calls: dict[str, int] = defaultdict(int)
+        # Last inline keyboard sent to each chat, to tap its buttons
+        self.keyboards: dict[int, InlineKeyboardMarkup] = {}
+
+    async def make_request(
+        self,
+        bot: Bot,
+        method: TelegramMethod[Any],
+        timeout: int | None = None,
+    ) -> Any:
+        name = type(method).__name__
+        self.calls[name] += 1
+
+        chat_id = getattr(method, "chat_id", None)
+        markup = getattr(method, "reply_markup", None)
+        if isinstance(chat_id, int) and isinstance(markup, InlineKeyboardMarkup):
+            self.keyboards[chat_id] = markup
+
+        if name == "GetMe":
+            return BOT_USER
+        if method.__returning__ is bool:
+            return True
+        return Message(
+            message_id=next(self.message_ids),
+            date=datetime.now(),
+            chat={"id": chat_id if isinstance(chat_id, int) else 0, "type": "private"},
+            from_user=BOT_USER,
+            text="ok",
+        )
+
+    async def stream_content(self, *args: Any, **kwargs: Any):
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+
+class UpdateFactory:
+    """Build synthetic updates from a virtual user."""
+
+    def __init__(self) -> None:
+        self.ids = itertools.count(1)
+
+    def message(self, telegram_id: int, text: str) -> Update:
+        entities = []
+        if text.startswith("/"):
+            entities = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        return Update(
+            update_id=next(self.ids),
+            message={
+                "message_id": next(self.ids),
+                "date": datetime.now(),
+                "chat": {"id": telegram_id, "type": "private"},
+                "from": {"id": telegram_id, "is_bot": False, "first_name": "Load"},
+                "text": text,
+                "entities": entities,
+            },
+        )
+
+    def callback(self, telegram_id: int, data: str) -> Update:
+        return Update(
+            update_id=next(self.ids),
+            callback_query={
+                "id": str(next(self.ids)),
+                "chat_instance": str(telegram_id),
+                "from": {"id": telegram_id, "is_bot": False, "first_name": "Load"},
+                "data": data,
+                "message": {
+                    "message_id": next(self.ids),
+                    "date": datetime.now(),
+                    "chat": {"id": telegram_id, "type": "private"},
+                    "text": "list",
+                },
+            },
+        )
+
+
+class LoadTest:
+    """Run scenarios for virtual users and collect per-step latencies."""
+
+    def __init__(
+        self,
+        dp: Dispatcher,
+        bot: Bot,
+        session: FakeSession,
+        concurrency: int,
+        weights: dict[str, int],
+    ) -> None:
+        self.dp = dp
+        self.weights = weights
+        self.bot = bot
+        self.session = session
+        self.updates = UpdateFactory()
+        self.limit = asyncio.Semaphore(concurrency)
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    async def feed(self, step: str, update: Update) -> None:
+        async with self.limit:
+            started = time.perf_counter()
+            try:
+                await self.dp.feed_update(self.bot, update)
+            except Exception:
+                self.errors[step] += 1
+                logging.getLogger(__name__).exception("Step %s failed", step)
+            finally:
+                self.latencies[step].append(time.perf_counter() - started)
+
+    async def new_dream(self, telegram_id: int, rng: random.Random) -> None:
+        steps = [
+            ("new", "/new"),
+            ("new:title", f"Dream about {rng.choice(WORDS)}"),
+            ("new:description", " ".join(rng.choices(WORDS, k=30))),
+            ("new:tags", ", ".join(rng.sample(WORDS, 3))),
+            ("new:notes", "/skip"),
+            ("new:date", "/today"),
+        ]
+        for step, text in steps:
+            await self.feed(step, self.updates.message(telegram_id, text))
+
+    async def list_dreams(self, telegram_id: int, rng: random.Random) -> None:
+        await self.feed("list", self.updates.message(telegram_id, "/list"))
+        for _ in range(rng.randint(1, 3)):
+            keyboard = self.session.keyboards.get(telegram_id)
+            buttons = [
+                button.callback_data
+                for row in (keyboard.inline_keyboard if keyboard else [])
+                for button in row
+                if button.callback_data and button.callback_data.startswith("page:")
+            ]
+            if not buttons:
+                break
+            await self.feed("page", self.updates.callback(telegram_id, buttons[-1]))
+
+    async def search(self, telegram_id: int, rng: random.Random) -> None:
+        await self.feed("search", self.updates.message(telegram_id, f"/search {rng.choice(WORDS)}"))
+
+    async def export(self, telegram_id: int, rng: random.Random) -> None:
+        fmt = rng.choice(["txt", "jsonl", "csv"])
+        await self.feed("export", self.updates.message(telegram_id, f"/export {fmt}"))
+
+    async def run_user(self, telegram_id: int, rounds: int, seed: int) -> None:
+        scenarios: dict[str, Callable[[int, random.Random], Awaitable[None]]] = {
+            "new_dream": self.new_dream,
+            "list": self.list_dreams,
+            "search": self.search,
+            "export": self.export,
+        }
+        rng = random.Random(seed)
+        names = list(self.weights)
+        weights = list(self.weights.values())
+        for _ in range(rounds):
+            await scenarios[rng.choices(names, weights)[0]](telegram_id, rng)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict[str, float]:
+    return {
+        "count": len(latencies),
+        "errors": errors,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": max(latencies) * 1000,
+    }
+
+
+async def seed_users(users: int, dreams_per_user: int, seed: int) -> list[int]:
+    """Create benchmark users with some dreams; returns their Telegram IDs."""
+    rng = random.Random(seed)
+    telegram_ids = [TELEGRAM_ID_BASE - n for n in range(users)]
+    async with async_session() as session:
+        await session.execute(delete(User).where(benchmark_users))
+        result = await session.execute(
+            insert(User)
+            .values([
+                {"telegram_id": tid, "language": "en", "dream_count": dreams_per_user}
+                for tid in telegram_ids
+            ])
+            .returning(User.id)
+        )
+        user_ids = list(result.scalars().all())
+
+        today = date.today()
+        rows = [
+            {
+                "user_id": user_id,
+                "title": f"Dream about {rng.choice(WORDS)}",
+                "description": " ".join(rng.choices(WORDS, k=40)),
+                "tags": ", ".join(rng.sample(WORDS, 3)),
+                "notes": "",
+                "dream_date": today - timedelta(days=n),
+            }
+            for user_id in user_ids
+            for n in range(dreams_per_user)
+        ]
+        if rows:
+            await session.execute(insert(Dream), rows)
+        await session.commit()
+    return telegram_ids
+
+
+async def cleanup() -> None:
+    async with async_session() as session:
+        await session.execute(delete(User).where(benchmark_users))
+        await session.commit()
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    telegram_ids = await seed_users(args.users, args.dreams_per_user, args.seed)
+
+    fake = FakeSession()
+    bot = Bot(
+        token="42:benchmark",
+        session=fake,
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+    )
+    dp = create_dispatcher(MemoryStorage())
+    load = LoadTest(dp, bot, fake, args.concurrency, parse_mix(args.mix))
+
+    dream_writer.start()
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            load.run_user(telegram_id, args.rounds, args.seed + n)
+            for n, telegram_id in enumerate(telegram_ids)
+        ))
+        elapsed = time.perf_counter() - started
+    finally:
+        await dream_writer.stop()
+        if not args.keep_data:
+            await cleanup()
+        await engine.dispose()
+
+    all_latencies = [value for values in load.latencies.values() for value in values]
+    return {
+        "config": vars(args),
+        "elapsed_s": elapsed,
+        "total": summarize(all_latencies, sum(load.errors.values()), elapsed),
+        "steps": {
+            step: summarize(values, load.errors[step], elapsed)
+            for step, values in sorted(load.latencies.items())
+        },
+        "bot_api_calls": dict(fake.calls),
+    }
+
+
+def print_report(results: dict[str, Any]) -> None:
+    header = f"{'step':<18}{'count':>7}{'err':>5}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    print(header)
+    print("-" * len(header))
+    rows = list(results["steps"].items()) + [("TOTAL", results["total"])]
+    for step, stats in rows:
+        print(
+            f"{step:<18}{stats['count']:>7}{stats['errors']:>5}{stats['throughput']:>9.1f}"
+            f"{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}"
+        )
+    print(f"\n{results['total']['count']} updates in {results['elapsed_s']:.1f} s")
+
+
+def parse_mix(mix: str | None) -> dict[str, int]:
+    """Parse "new_dream=2,list=4" into scenario weights."""
+    if not mix:
+        return SCENARIO_WEIGHTS
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIO_WEIGHTS:
+            raise SystemExit(f"Unknown scenario {name!r}, expected one of {', '.join(SCENARIO_WEIGHTS)}")
+        weights[name] = int(weight or 1)
+    return weights
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100, help="virtual users")
+    parser.add_argument("--rounds", type=int, default=5, help="scenarios per user")
+    parser.add_argument("--concurrency", type=int, default=50, help="max updates in flight")
+    parser.add_argument("--dreams-per-user", type=int, default=50, help="dreams seeded per user")
+    parser.add_argument(
+        "--mix",
+        help="scenario weights, e.g. new_dream=2,list=4 (default: %s)"
+        % ",".join(f"{name}={weight}" for name, weight in SCENARIO_WEIGHTS.items()),
+    )
+    parser.add_argument("--seed", type=int, default=1, help="random seed")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--keep-data", action="store_true", help="keep benchmark users afterwards")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    # src.main configures INFO logging on import; keep the report readable
+    logging.getLogger().setLevel(logging.WARNING)
+    results = asyncio.run(run(args))
+    print_report(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Time the queries behind /list, /view, /search, /tags and /export.
+
+Picks a light, a median and the heaviest user from the current data set,
+runs each query several times for each of them and reports median/p95
+latency together with the total number of dreams in the table. With
+--explain the exact SQL each query sends is re-run under
+EXPLAIN (ANALYZE, BUFFERS) and the plans are printed and saved.
+
+To see how queries scale, fill a development database step by step with
+benchmarks.generate_data and run this after each step, e.g.:
+    python -m benchmarks.generate_data --users 10 --dreams 100
+    python -m benchmarks.query_benchmark --explain --output q-1k.json
+    python -m benchmarks.generate_data --users 1000 --dreams 100
+    python -m benchmarks.query_benchmark --explain --output q-100k.json
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import event, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import settings
+from src.database import async_session, engine
+from src.exporters import JsonLinesWriter, export_dreams
+from src.handlers.dreams import fetch_dreams_page
+from src.handlers.search import search_fuzzy, search_ranked
+from src.models import Dream, Tag, User
+from src.repository import get_dream
+from src.tags import get_dreams_by_tag, get_tag_cloud
+
+# A frequent word and a misspelled one per language (see generate_data)
+SEARCH_TERMS = {"en": ("forest", "forrest"), "ru": ("лес", "лесс")}
+
+# Statements sent while capturing is on, as (SQL, driver parameters)
+_captured: list[tuple[str, Any]] | None = None
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _capture_statement(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _captured is not None:
+        _captured.append((statement, parameters))
+
+
+@dataclass
+class Profile:
+    """A user the queries are run for."""
+
+    name: str
+    user_id: int
+    lang: str
+    dream_count: int
+    # Filled in by prepare()
+    dream_id: int = 0
+    tag: str = ""
+    deep_cursor: tuple | None = None
+
+
+@dataclass
+class Result:
+    profile: str
+    query: str
+    dream_count: int
+    timings: list[float] = field(default_factory=list)
+    error: str | None = None
+    plans: list[str] = field(default_factory=list)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "profile": self.profile,
+            "query": self.query,
+            "user_dreams": self.dream_count,
+            "median_ms": percentile(self.timings, 50),
+            "p95_ms": percentile(self.timings, 95),
+            "runs": len(self.timings),
+            "error": self.error,
+            "plans": self.plans,
+        }
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] * 1000, 2)
+
+
+async def pick_profiles(session: AsyncSession) -> list[Profile]:
+    """Light (10th percentile), median and heaviest user by dream count."""
+    stmt = select(
+        func.percentile_disc(0.1).within_group(User.dream_count),
+        func.percentile_disc(0.5).within_group(User.dream_count),
+        func.max(User.dream_count),
+    ).where(User.dream_count > 0)
+    row = (await session.execute(stmt)).one()
+    if row[2] is None:
+        return []
+
+    profiles = []
+    for name, target in zip(("light", "median", "heavy"), row):
+        user = (await session.execute(
+            select(User)
+            .where(User.dream_count >= target)
+            .order_by(User.dream_count, User.id)
+            .limit(1)
+        )).scalar_one()
+        profiles.append(Profile(name, user.id, user.language, user.dream_count))
+    return profiles
+
+
+async def prepare(session: AsyncSession, profile: Profile) -> None:
+    """Pick a dream, a tag and a deep pagination cursor for the user."""
+    ordered = (
+        select(Dream.id, Dream.dream_date)
+        .where(Dream.user_id == profile.user_id)
+        .order_by(Dream.dream_date.desc(), Dream.id.desc())
+    )
+    middle = (await session.execute(ordered.offset(profile.dream_count // 2).limit(1))).first()
+    if middle is not None:
+        profile.dream_id = middle.id
+        profile.deep_cursor = ("n", middle.dream_date, middle.id)
+
+    cloud = await get_tag_cloud(session, profile.user_id, 1)
+    if cloud:
+        profile.tag = cloud[0][0]
+    else:
+        tag = (await session.execute(
+            select(Tag.name).where(Tag.user_id == profile.user_id).limit(1)
+        )).scalar()
+        profile.tag = tag or "none"
+
+
+def build_queries(profile: Profile) -> dict[str, Callable[[AsyncSession], Awaitable[Any]]]:
+    word, typo = SEARCH_TERMS.get(profile.lang, SEARCH_TERMS["en"])
+    return {
+        "list.first_page": lambda s: fetch_dreams_page(s, profile.user_id, None, settings.dreams_per_page),
+        "list.deep_page": lambda s: fetch_dreams_page(
+            s, profile.user_id, profile.deep_cursor, settings.dreams_per_page
+        ),
+        "view": lambda s: get_dream(s, profile.dream_id, profile.user_id),
+        "search.ranked": lambda s: search_ranked(s, profile.user_id, word, profile.lang),
+        "search.fuzzy": lambda s: search_fuzzy(s, profile.user_id, typo),
+        "tags.cloud": lambda s: get_tag_cloud(s, profile.user_id, 30),
+        "tags.dreams": lambda s: get_dreams_by_tag(s, profile.user_id, profile.tag, 20),
+        "export.jsonl": lambda s: export_dreams(
+            s, JsonLinesWriter(io.StringIO()), profile.user_id, profile.dream_count
+        ),
+    }
+
+
+async def explain(statements: list[tuple[str, Any]]) -> list[str]:
+    plans = []
+    async with engine.connect() as conn:
+        for statement, parameters in statements:
+            result = await conn.exec_driver_sql(
+                f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters
+            )
+            plans.append("\n".join(row[0] for row in result))
+        await conn.rollback()
+    return plans
+
+
+async def run_query(
+    profile: Profile,
+    name: str,
+    query: Callable[[AsyncSession], Awaitable[Any]],
+    repeats: int,
+    with_plans: bool,
+) -> Result:
+    global _captured
+    result = Result(profile.name, name, profile.dream_count)
+    for run in range(repeats + 1):
+        async with async_session() as session:
+            if run == 0:
+                _captured = []
+            started = time.perf_counter()
+            try:
+                await query(session)
+            except Exception as exc:
+                result.error = f"{type(exc).__name__}: {exc}".splitlines()[0]
+                return result
+            finally:
+                statements, _captured = _captured, None
+                await session.rollback()
+            elapsed = time.perf_counter() - started
+        # The first run only warms up caches and records the SQL
+        if run == 0:
+            if with_plans and statements:
+                result.plans = await explain(statements)
+        else:
+            result.timings.append(elapsed)
+    return result
+
+
+async def table_size() -> int:
+    async with engine.connect() as conn:
+        return (await conn.execute(
+            text("SELECT greatest(reltuples, 0)::bigint FROM pg_class WHERE relname = 'dreams'")
+        )).scalar_one()
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    async with async_session() as session:
+        profiles = await pick_profiles(session)
+        for profile in profiles:
+            await prepare(session, profile)
+
+    results = []
+    for profile in profiles:
+        for name, query in build_queries(profile).items():
+            if args.only and not name.startswith(tuple(args.only)):
+                continue
+            results.append(await run_query(profile, name, query, args.repeats, args.explain))
+
+    return {
+        "dreams_total": await table_size(),
+        "results": [r.to_dict() for r in results],
+    }
+
+
+def print_report(report: dict[str, Any], show_plans: bool) -> None:
+    print(f"dreams in table: ~{report['dreams_total']}")
+    print(f"{'query':<18} {'profile':<8} {'dreams':>8} {'p50 ms':>9} {'p95 ms':>9}")
+    for r in report["results"]:
+        if r["error"]:
+            print(f"{r['query']:<18} {r['profile']:<8} {r['user_dreams']:>8}  failed: {r['error']}")
+            continue
+        print(
+            f"{r['query']:<18} {r['profile']:<8} {r['user_dreams']:>8} "
+            f"{r['median_ms']:>9.2f} {r['p95_ms']:>9.2f}"
+        )
+    if show_plans:
+        for r in report["results"]:
+            for plan in r["plans"]:
+                print(f"\n--- {r['query']} ({r['profile']}) ---\n{plan}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--repeats", type=int, default=20, help="timed runs per query")
+    parser.add_argument("--explain", action="store_true", help="collect EXPLAIN ANALYZE plans")
+    parser.add_argument("--only", nargs="*", help="query name prefixes to run (e.g. list search)")
+    parser.add_argument("--output", help="write results (and plans) as JSON")
+    return parser.parse_args()
+
+
+async def main() -> None:
+    args = parse_args()
+    try:
+        report = await run(args)
+    finally:
+        await engine.dispose()
+
+    if not report["results"]:
+        print("No users with dreams - fill the database with benchmarks.generate_data first")
+        return
+    print_report(report, args.explain)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,169 @@
+"""
+Count database round trips per dream write operation.
+
+Runs the create/edit/delete flows the way the handlers used to (ORM load,
+mutate, flush) and through src.repository, and prints the number of
+statements, BEGINs and COMMIT/ROLLBACKs each one sends to PostgreSQL.
+
+Usage (against a migrated development database):
+    python -m benchmarks.round_trips
+"""
+
+import asyncio
+from collections import Counter
+from datetime import date
+
+from sqlalchemy import delete, event, update
+
+from src.database import async_session, engine
+from src.models import Dream, User
+from src.repository import create_dream, delete_dream, get_dream, update_dream_field
+from src.tags import parse_tags, set_dream_tags
+
+# Telegram IDs are positive, so this never collides with a real user
+BENCHMARK_TELEGRAM_ID = -1
+
+TAGS = "flying, water"
+
+counter: Counter[str] = Counter()
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def count_statement(conn, cursor, statement, parameters, context, executemany) -> None:
+    counter["statements"] += 1
+
+
+@event.listens_for(engine.sync_engine, "begin")
+def count_begin(conn) -> None:
+    counter["begin"] += 1
+
+
+@event.listens_for(engine.sync_engine, "commit")
+def count_commit(conn) -> None:
+    counter["commit"] += 1
+
+
+@event.listens_for(engine.sync_engine, "rollback")
+def count_rollback(conn) -> None:
+    # Closing a session without committing ends its transaction this way
+    counter["rollback"] += 1
+
+
+# --- Legacy flows: a separate ownership lookup, then load + mutate + flush ---
+
+
+async def legacy_lookup(dream_id: int, user_id: int) -> Dream | None:
+    async with async_session() as session:
+        return await get_dream(session, dream_id, user_id)
+
+
+async def legacy_create(user_id: int) -> int:
+    async with async_session() as session:
+        dream = Dream(
+            user_id=user_id,
+            title="Benchmark",
+            description="",
+            tags=TAGS,
+            notes="",
+            dream_date=date.today(),
+        )
+        session.add(dream)
+        await session.flush()
+        await session.execute(
+            update(User).where(User.id == user_id).values(dream_count=User.dream_count + 1)
+        )
+        await set_dream_tags(session, user_id, {dream.id: parse_tags(dream.tags)})
+        await session.commit()
+        return dream.id
+
+
+async def legacy_edit(dream_id: int, user_id: int) -> None:
+    await legacy_lookup(dream_id, user_id)  # /edit
+    async with async_session() as session:  # new value
+        dream = await get_dream(session, dream_id, user_id)
+        dream.title = "Edited"
+        await session.commit()
+
+
+async def legacy_delete(dream_id: int, user_id: int) -> None:
+    await legacy_lookup(dream_id, user_id)  # /delete
+    async with async_session() as session:  # confirmation
+        dream = await get_dream(session, dream_id, user_id)
+        await session.delete(dream)
+        await session.execute(
+            update(User).where(User.id == user_id).values(dream_count=User.dream_count - 1)
+        )
+        await session.commit()
+
+
+# --- Repository flows ---
+
+
+async def repo_create(user_id: int) -> int:
+    async with async_session() as session:
+        dream_id = await create_dream(
+            session,
+            user_id=user_id,
+            title="Benchmark",
+            description="",
+            tags=TAGS,
+            notes="",
+            dream_date=date.today(),
+        )
+        await session.commit()
+        return dream_id
+
+
+async def repo_edit(dream_id: int, user_id: int) -> None:
+    await legacy_lookup(dream_id, user_id)  # /edit still shows the title
+    async with async_session() as session:
+        await update_dream_field(session, dream_id, user_id, "title", "Edited")
+        await session.commit()
+
+
+async def repo_delete(dream_id: int, user_id: int) -> None:
+    await legacy_lookup(dream_id, user_id)  # /delete still shows the title
+    async with async_session() as session:
+        await delete_dream(session, dream_id, user_id)
+        await session.commit()
+
+
+async def measure(name: str, operation) -> None:
+    counter.clear()
+    await operation
+    trips = sum(counter.values())
+    print(
+        f"{name:<18} {trips:>3} round trips "
+        f"({counter['statements']} statements, {counter['begin']} begin, "
+        f"{counter['commit']} commit, {counter['rollback']} rollback)"
+    )
+
+
+async def main() -> None:
+    async with async_session() as session:
+        await session.execute(delete(User).where(User.telegram_id == BENCHMARK_TELEGRAM_ID))
+        user = User(telegram_id=BENCHMARK_TELEGRAM_ID, language="en")
+        session.add(user)
+        await session.commit()
+        user_id = user.id
+
+    try:
+        counter.clear()
+        dream_id = await legacy_create(user_id)
+        await measure("legacy create", legacy_create(user_id))
+        await measure("legacy edit", legacy_edit(dream_id, user_id))
+        await measure("legacy delete", legacy_delete(dream_id, user_id))
+
+        dream_id = await repo_create(user_id)
+        await measure("repository create", repo_create(user_id))
+        await measure("repository edit", repo_edit(dream_id, user_id))
+        await measure("repository delete", repo_delete(dream_id, user_id))
+    finally:
+        async with async_session() as session:
+            await session.execute(delete(User).where(User.id == user_id))
+            await session.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
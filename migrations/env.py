@@ -16,6 +16,15 @@ if config.config_file_name is not None:
 
 target_metadata = Base.metadata
 
+# Created by migrations only: the model cannot declare them because
+# init_db() would then need pg_trgm on a fresh database
+MIGRATION_ONLY_INDEXES = {"ix_dreams_fuzzy_trgm"}
+
+
+def include_object(object, name, type_, reflected, compare_to) -> bool:
+    """Keep autogenerate from dropping indexes that only migrations create."""
+    return not (type_ == "index" and name in MIGRATION_ONLY_INDEXES)
+
 
 def get_url() -> str:
     """Get database URL from settings."""
@@ -28,6 +37,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -38,7 +48,11 @@ def run_migrations_offline() -> None:
 
 def do_run_migrations(connection: Connection) -> None:
     """Run migrations with connection."""
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
@@ -0,0 +1,41 @@
+"""Add dream_count counter to users table
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "002"
+down_revision: Union[str, None] = "001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("dream_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    # Backfill counters once; from here on they are maintained incrementally
+    op.execute(
+        """
+        UPDATE users
+        SET dream_count = counts.total
+        FROM (
+            SELECT user_id, COUNT(*) AS total
+            FROM dreams
+            GROUP BY user_id
+        ) AS counts
+        WHERE users.id = counts.user_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "dream_count")
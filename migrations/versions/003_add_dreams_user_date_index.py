@@ -0,0 +1,38 @@
+"""Add composite (user_id, dream_date, id) index on dreams
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "003"
+down_revision: Union[str, None] = "002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_dreams_user_id_dream_date_id",
+            "dreams",
+            ["user_id", "dream_date", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_dreams_user_id_dream_date_id",
+            table_name="dreams",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,169 @@
+"""Add full-text search vector and trigram index to dreams
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "004"
+down_revision: Union[str, None] = "003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column(
+        "dreams",
+        sa.Column("search_vector", postgresql.TSVECTOR(), nullable=True),
+    )
+
+    # Text search configuration for a user's interface language
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION dream_search_config(lang text)
+        RETURNS regconfig
+        LANGUAGE sql IMMUTABLE AS $$
+            SELECT CASE lang
+                WHEN 'ru' THEN 'pg_catalog.russian'::regconfig
+                ELSE 'pg_catalog.english'::regconfig
+            END
+        $$
+        """
+    )
+    # Title matches rank above tags, description and notes
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION dream_search_vector(
+            cfg regconfig, title text, description text, tags text, notes text
+        )
+        RETURNS tsvector
+        LANGUAGE sql IMMUTABLE AS $$
+            SELECT setweight(to_tsvector(cfg, coalesce(title, '')), 'A')
+                || setweight(to_tsvector(cfg, coalesce(tags, '')), 'B')
+                || setweight(to_tsvector(cfg, coalesce(description, '')), 'C')
+                || setweight(to_tsvector(cfg, coalesce(notes, '')), 'D')
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION dreams_search_vector_update()
+        RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            NEW.search_vector := dream_search_vector(
+                dream_search_config(
+                    (SELECT language FROM users WHERE id = NEW.user_id)
+                ),
+                NEW.title, NEW.description, NEW.tags, NEW.notes
+            );
+            RETURN NEW;
+        END
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER dreams_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF title, description, tags, notes, user_id
+        ON dreams
+        FOR EACH ROW EXECUTE FUNCTION dreams_search_vector_update()
+        """
+    )
+    # Re-stem a user's diary when they switch language
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION users_language_reindex_dreams()
+        RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE dreams
+            SET search_vector = dream_search_vector(
+                dream_search_config(NEW.language),
+                title, description, tags, notes
+            )
+            WHERE user_id = NEW.id;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER users_language_reindex_trigger
+        AFTER UPDATE OF language ON users
+        FOR EACH ROW
+        WHEN (OLD.language IS DISTINCT FROM NEW.language)
+        EXECUTE FUNCTION users_language_reindex_dreams()
+        """
+    )
+
+    connection = op.get_bind()
+    with op.get_context().autocommit_block():
+        # Backfill in id-range batches, each committed on its own, so the
+        # table is never locked by one long-running UPDATE
+        max_id = connection.execute(
+            sa.text("SELECT COALESCE(MAX(id), 0) FROM dreams")
+        ).scalar()
+        for low in range(0, max_id, BACKFILL_BATCH_SIZE):
+            connection.execute(
+                sa.text(
+                    """
+                    UPDATE dreams AS d
+                    SET search_vector = dream_search_vector(
+                        dream_search_config(u.language),
+                        d.title, d.description, d.tags, d.notes
+                    )
+                    FROM users AS u
+                    WHERE u.id = d.user_id
+                      AND d.id > :low AND d.id <= :high
+                      AND d.search_vector IS NULL
+                    """
+                ),
+                {"low": low, "high": low + BACKFILL_BATCH_SIZE},
+            )
+
+        op.create_index(
+            "ix_dreams_search_vector",
+            "dreams",
+            ["search_vector"],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # Expression must match the fuzzy fallback in handlers/search.py
+        op.execute(
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_dreams_fuzzy_trgm
+            ON dreams USING gin ((title || ' ' || tags) gin_trgm_ops)
+            """
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_dreams_fuzzy_trgm")
+        op.drop_index(
+            "ix_dreams_search_vector",
+            table_name="dreams",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+    op.execute("DROP TRIGGER IF EXISTS users_language_reindex_trigger ON users")
+    op.execute("DROP FUNCTION IF EXISTS users_language_reindex_dreams()")
+    op.execute("DROP TRIGGER IF EXISTS dreams_search_vector_trigger ON dreams")
+    op.execute("DROP FUNCTION IF EXISTS dreams_search_vector_update()")
+    op.execute("DROP FUNCTION IF EXISTS dream_search_vector(regconfig, text, text, text, text)")
+    op.execute("DROP FUNCTION IF EXISTS dream_search_config(text)")
+    op.drop_column("dreams", "search_vector")
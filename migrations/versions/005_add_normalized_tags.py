@@ -0,0 +1,80 @@
+"""Add normalized tags and dream_tags tables
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "005"
+down_revision: Union[str, None] = "004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match src.tags.parse_tags
+NORMALIZED_TAG = "left(lower(btrim(raw.tag)), 100)"
+
+
+def upgrade() -> None:
+    op.create_table(
+        "tags",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "user_id",
+            sa.Integer(),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.UniqueConstraint("user_id", "name", name="uq_tags_user_id_name"),
+    )
+    op.create_table(
+        "dream_tags",
+        sa.Column(
+            "dream_id",
+            sa.Integer(),
+            sa.ForeignKey("dreams.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column(
+            "tag_id",
+            sa.Integer(),
+            sa.ForeignKey("tags.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+    )
+    op.create_index("ix_dream_tags_tag_id_dream_id", "dream_tags", ["tag_id", "dream_id"])
+
+    # Split existing comma-separated strings into the new tables
+    op.execute(
+        f"""
+        INSERT INTO tags (user_id, name)
+        SELECT DISTINCT d.user_id, {NORMALIZED_TAG}
+        FROM dreams AS d
+        CROSS JOIN LATERAL unnest(string_to_array(d.tags, ',')) AS raw(tag)
+        WHERE btrim(raw.tag) <> ''
+        ON CONFLICT DO NOTHING
+        """
+    )
+    op.execute(
+        f"""
+        INSERT INTO dream_tags (dream_id, tag_id)
+        SELECT DISTINCT d.id, t.id
+        FROM dreams AS d
+        CROSS JOIN LATERAL unnest(string_to_array(d.tags, ',')) AS raw(tag)
+        JOIN tags AS t ON t.user_id = d.user_id AND t.name = {NORMALIZED_TAG}
+        WHERE btrim(raw.tag) <> ''
+        ON CONFLICT DO NOTHING
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_dream_tags_tag_id_dream_id", table_name="dream_tags")
+    op.drop_table("dream_tags")
+    op.drop_table("tags")
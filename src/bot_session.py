@@ -0,0 +1,37 @@
+"""HTTP session for Bot API requests."""
+
+from typing import Any
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.methods import TelegramMethod
+from aiohttp import FormData
+
+from src.keyboards import is_prebuilt
+
+
+class BotSession(AiohttpSession):
+    """
+    Aiohttp session that serializes each shared keyboard only once.
+
+    Prebuilt keyboards (see src/keyboards.py) never change, so their JSON
+    is produced on first use and reused for every later request.
+    """
+
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self._markup_json: dict[int, str] = {}
+
+    def build_form_data(self, bot: Bot, method: TelegramMethod[Any]) -> FormData:
+        markup = getattr(method, "reply_markup", None)
+        if markup is None or not is_prebuilt(markup):
+            return super().build_form_data(bot, method)
+
+        serialized = self._markup_json.get(id(markup))
+        if serialized is None:
+            serialized = self.prepare_value(markup.model_dump(warnings=False), bot=bot, files={})
+            self._markup_json[id(markup)] = serialized
+
+        form = super().build_form_data(bot, method.model_copy(update={"reply_markup": None}))
+        form.add_field("reply_markup", serialized)
+        return form
@@ -0,0 +1,61 @@
+"""Reply keyboard buttons resolved to language-independent actions."""
+
+from aiogram.filters import Filter
+from aiogram.types import Message
+
+from src.locales import locale
+
+BUTTON_PREFIX = "buttons."
+
+
+def build_button_index() -> dict[str, str]:
+    """
+    Map every button label in every loaded language to its action.
+
+    The action is the key under "buttons" in the locale files
+    ("buttons.new_dream" -> "new_dream").
+
+    Raises:
+        ValueError: If one label means different actions in different languages
+    """
+    index: dict[str, str] = {}
+    for lang, translations in locale.translations.items():
+        for key, text in translations.items():
+            if not key.startswith(BUTTON_PREFIX):
+                continue
+            action = key.removeprefix(BUTTON_PREFIX)
+            if index.setdefault(text, action) != action:
+                raise ValueError(
+                    f"Button label {text!r} ({lang}) is used for both "
+                    f"{index[text]!r} and {action!r}"
+                )
+    return index
+
+
+# Button label -> action, for all languages at once
+button_actions = build_button_index()
+
+
+def resolve_button(text: str | None) -> str | None:
+    """Action of a pressed reply keyboard button, or None for other text."""
+    if text is None:
+        return None
+    return button_actions.get(text)
+
+
+class Button(Filter):
+    """
+    Match messages produced by pressing one of the given buttons.
+
+    Relies on ButtonMiddleware having put the resolved action into
+    handler data as "button".
+    """
+
+    def __init__(self, *actions: str) -> None:
+        unknown = set(actions) - set(button_actions.values())
+        if unknown:
+            raise ValueError(f"Unknown button actions: {', '.join(sorted(unknown))}")
+        self.actions = frozenset(actions)
+
+    async def __call__(self, message: Message, button: str | None = None) -> bool:
+        return button in self.actions
@@ -0,0 +1,157 @@
+"""In-process caches."""
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Generic, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class TTLCache(Generic[K, V]):
+    """
+    LRU cache with per-entry expiry and hit/miss counters.
+
+    Concurrent loads of the same missing key are coalesced into one
+    loader call.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._loading: dict[K, asyncio.Future[V]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        """Get a cached value without touching the counters."""
+        value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def _lookup(self, key: K) -> V | object:
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        """Store a value, evicting the least recently used entries if full."""
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: K) -> None:
+        """Drop a cached value."""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all cached values."""
+        self._entries.clear()
+
+    async def get_or_load(
+        self,
+        key: K,
+        loader: Callable[[], Awaitable[V]],
+        ttl_of: Callable[[V], float | None] | None = None,
+    ) -> V:
+        """
+        Get a cached value or load, cache and return it.
+
+        ``ttl_of`` may pick a different lifetime for a loaded value
+        (None keeps the cache's TTL).
+        """
+        value = self._lookup(key)
+        if value is not _MISSING:
+            self.hits += 1
+            return value  # type: ignore[return-value]
+
+        self.misses += 1
+        pending = self._loading.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future: asyncio.Future[V] = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        try:
+            value = await loader()
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Mark retrieved so an unawaited failure is not logged
+            future.exception()
+            raise
+        else:
+            self.set(key, value, ttl_of(value) if ttl_of is not None else None)
+            future.set_result(value)
+            return value
+        finally:
+            del self._loading[key]
+
+
+class SizedCache(Generic[K, V]):
+    """
+    LRU cache bounded by the total size of its values, with per-entry expiry.
+
+    Callers pass the approximate size of each value in bytes; the least
+    recently used entries are evicted once ``max_bytes`` is exceeded.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        # key -> (expiry time, size, value)
+        self._entries: OrderedDict[K, tuple[float, int, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K) -> V | None:
+        """Get a cached value, counting the hit or miss."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= time.monotonic():
+            self.invalidate(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[2]
+
+    def set(self, key: K, value: V, size: int) -> None:
+        """Store a value of ``size`` bytes, evicting old entries to stay in budget."""
+        self.invalidate(key)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, size, value)
+        self.size += size
+        while self.size > self.max_bytes:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+
+    def invalidate(self, key: K) -> None:
+        """Drop a cached value."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+    def clear(self) -> None:
+        """Drop all cached values."""
+        self._entries.clear()
+        self.size = 0
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -20,9 +22,119 @@ class Settings(BaseSettings):
     postgres_host: str = "db"
     postgres_port: int = 5432
 
+    # Connection pool (per process)
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+    # Seconds to wait for a free connection before failing
+    db_pool_timeout: float = 30.0
+    # Replace connections older than this many seconds (-1 keeps them forever)
+    db_pool_recycle: int = 1800
+    # Test each connection before use; costs a round trip per checkout.
+    # Without it a dropped connection fails one query and the pool is refreshed
+    db_pool_pre_ping: bool = True
+    # asyncpg prepared statements cached per connection (0 disables)
+    db_statement_cache_size: int = 100
+    # Connect through PgBouncer in transaction pooling mode
+    db_pgbouncer: bool = False
+    # Log pool usage every this many seconds (0 disables)
+    db_pool_log_interval: float = 60.0
+
+    # Optional streaming replica serving list, view, search, tags and export
+    postgres_replica_host: str = ""
+    postgres_replica_port: int = 5432
+    # Seconds a user's reads stay on the primary after they write
+    replica_stickiness: float = 10.0
+    # Where that window is tracked: "memory" (per process) or "redis"
+    # (shared by all processes through redis_url)
+    replica_stickiness_backend: Literal["memory", "redis"] = "memory"
+    # Users tracked in memory per process
+    replica_stickiness_cache_size: int = 10000
+
     # Pagination
     dreams_per_page: int = 5
 
+    # Rendered /list pages kept in memory (bytes, 0 disables). Pages are
+    # dropped when the user's dreams change and expire after the TTL
+    list_cache_bytes: int = 16 * 1024 * 1024
+    list_cache_ttl: float = 300.0
+
+    # FSM storage: "memory" (single process), "redis" or "postgres"
+    fsm_storage: Literal["memory", "redis", "postgres"] = "memory"
+    redis_url: str = "redis://redis:6379/0"
+    # Abandoned conversations expire after this many seconds
+    fsm_state_ttl: int = 86400
+
+    # Cache of telegram_id -> (user ID, language) lookups, per process;
+    # unregistered users are cached for the shorter negative TTL
+    identity_cache_size: int = 10000
+    identity_cache_ttl: float = 300.0
+    identity_negative_ttl: float = 5.0
+
+    # Concurrent new dreams are inserted in batches of up to this many rows,
+    # waiting at most this long for a batch to fill
+    dream_write_batch_size: int = 100
+    dream_write_batch_delay_ms: float = 5.0
+    # Saving blocks once this many dreams are waiting to be written
+    dream_write_queue_size: int = 1000
+
+    # Per-user rate limits: a bucket of "burst" requests refilled at "rate"
+    # per second, for each of search, export and everything else.
+    # "redis" shares the buckets between processes (uses redis_url)
+    throttle_backend: Literal["memory", "redis"] = "memory"
+    throttle_default_rate: float = 2.0
+    throttle_default_burst: int = 10
+    throttle_search_rate: float = 0.2
+    throttle_search_burst: int = 5
+    throttle_export_rate: float = 1 / 60
+    throttle_export_burst: int = 2
+    # Pagination taps closer together than this many seconds are ignored
+    pagination_debounce: float = 0.5
+    # Throttled users are told so at most once per this many seconds
+    throttle_notice_interval: float = 10.0
+    # Buckets kept by the memory backend and users remembered as notified,
+    # per process; the least recently used are dropped first
+    throttle_memory_buckets: int = 10000
+    throttle_notice_cache_size: int = 10000
+    # An export holds its per-user lock at most this long, even if it hangs
+    export_lock_timeout: float = 600.0
+
+    # Outgoing messages per second, overall and per chat (Telegram allows
+    # about 30/s overall and 1/s per chat, with short bursts)
+    bot_global_rate: float = 30.0
+    bot_chat_rate: float = 1.0
+    bot_chat_burst: int = 3
+    # Chats whose send buckets are tracked; idle ones are forgotten first
+    bot_chat_cache_size: int = 10000
+    # Times a message rejected with 429 Too Many Requests is retried
+    bot_retry_attempts: int = 3
+
+    # Update delivery: "polling" or "webhook"
+    run_mode: Literal["polling", "webhook"] = "polling"
+    # Public HTTPS URL Telegram posts updates to (webhook mode)
+    webhook_base_url: str = ""
+    webhook_path: str = "/webhook"
+    webhook_secret: str = ""
+    # Concurrent HTTPS connections Telegram opens to deliver updates (1-100)
+    webhook_max_connections: int = 40
+
+    # Web server (webhook and health endpoints)
+    web_host: str = "0.0.0.0"
+    web_port: int = 8080
+    web_shutdown_timeout: float = 30.0
+
+    # Prometheus metrics on /metrics (also starts the web server when polling).
+    # Unauthenticated, so off by default: only enable it on a private network
+    metrics_enabled: bool = False
+
+    # Log every SQL statement of every update with a per-update trace ID
+    trace_enabled: bool = False
+    # Warn about statements slower than this many milliseconds (0 disables)
+    slow_query_ms: float = 500.0
+    # With tracing on, also export OpenTelemetry spans: "none", "otlp" or "file"
+    otel_exporter: Literal["none", "otlp", "file"] = "none"
+    otel_endpoint: str = "http://localhost:4318/v1/traces"
+    otel_file: str = "traces.jsonl"
+
     @property
     def database_url(self) -> str:
         """Construct async PostgreSQL connection URL."""
@@ -31,5 +143,15 @@ class Settings(BaseSettings):
             f"@{self.postgres_host}:{self.postgres_port}/{self.postgres_db}"
         )
 
+    @property
+    def replica_database_url(self) -> str | None:
+        """Construct the replica connection URL, if a replica is configured."""
+        if not self.postgres_replica_host:
+            return None
+        return (
+            f"postgresql+asyncpg://{self.postgres_user}:{self.postgres_password}"
+            f"@{self.postgres_replica_host}:{self.postgres_replica_port}/{self.postgres_db}"
+        )
+
 
 settings = Settings()
@@ -1,25 +1,216 @@
+import asyncio
+import logging
+import time
 from collections.abc import AsyncGenerator
+from typing import Any
+from uuid import uuid4
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.orm import ORMExecuteState, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
+from src.cache import TTLCache
 from src.config import settings
 
-engine = create_async_engine(
-    settings.database_url,
-    echo=False,
-    pool_pre_ping=True,
-)
+logger = logging.getLogger(__name__)
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that tracks how long checkouts wait for a connection."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.waiting = 0
+        self.checkouts = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def _do_get(self) -> Any:
+        self.waiting += 1
+        started = time.monotonic()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.monotonic() - started
+            self.waiting -= 1
+            self.checkouts += 1
+            self.wait_time += waited
+            self.max_wait_time = max(self.max_wait_time, waited)
+
+    def recreate(self) -> "InstrumentedPool":
+        pool = super().recreate()
+        # Keep counters across pool invalidation (e.g. after a failover)
+        pool.checkouts = self.checkouts
+        pool.wait_time = self.wait_time
+        pool.max_wait_time = self.max_wait_time
+        return pool
+
+
+def get_connect_args() -> dict[str, Any]:
+    """asyncpg connection arguments for statement caching / PgBouncer mode."""
+    if settings.db_pgbouncer:
+        # PgBouncer in transaction mode hands each transaction a different
+        # server connection, so named prepared statements cannot be reused
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    return {"prepared_statement_cache_size": settings.db_statement_cache_size}
+
+
+def make_engine(url: str) -> AsyncEngine:
+    """Create an engine with the configured connection pool."""
+    return create_async_engine(
+        url,
+        echo=False,
+        poolclass=InstrumentedPool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args=get_connect_args(),
+    )
+
+
+class PrimarySession(Session):
+    """Session bound to the primary that records whether it wrote anything."""
+
+
+class PrimaryAsyncSession(AsyncSession):
+    """Async session for the primary that flags its user as a recent writer on commit."""
+
+    async def commit(self) -> None:
+        await super().commit()
+        # Set by _mark_writer; the shared marker needs an await, which the
+        # synchronous after_commit hook cannot do
+        telegram_id = self.info.pop("written_by", None)
+        if telegram_id is not None:
+            await mark_written(telegram_id)
+
+
+engine = make_engine(settings.database_url)
 
 async_session = async_sessionmaker(
     engine,
-    class_=AsyncSession,
+    class_=PrimaryAsyncSession,
+    sync_session_class=PrimarySession,
     expire_on_commit=False,
 )
 
+# Optional streaming replica for read-only handlers
+replica_engine = (
+    make_engine(settings.replica_database_url) if settings.replica_database_url else None
+)
+replica_session = (
+    async_sessionmaker(replica_engine, class_=AsyncSession, expire_on_commit=False)
+    if replica_engine is not None
+    else None
+)
+
+class RecentWriters:
+    """
+    Telegram IDs of users who wrote within the last ``ttl`` seconds.
+
+    Their reads stay on the primary until the replica has had time to replay
+    the write (read-your-writes). Markers are kept in process memory and,
+    when a Redis client is given, in Redis too, so that the user's next
+    update sees them whichever bot process receives it.
+    """
+
+    def __init__(self, ttl: float, maxsize: int, redis: Any = None, prefix: str = "writer") -> None:
+        self.ttl = ttl
+        self.redis = redis
+        self.prefix = prefix
+        self._local: TTLCache[int, bool] = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def mark(self, telegram_id: int) -> None:
+        """Start the user's stickiness window."""
+        self._local.set(telegram_id, True)
+        if self.redis is None:
+            return
+        try:
+            await self.redis.set(f"{self.prefix}:{telegram_id}", 1, px=int(self.ttl * 1000))
+        except Exception:
+            # The write is already committed; other processes may serve a
+            # stale read, which is better than reporting the write as failed
+            logger.warning("Could not share the stickiness marker of %s", telegram_id, exc_info=True)
+
+    async def contains(self, telegram_id: int) -> bool:
+        """Whether the user wrote recently, in this process or any other."""
+        if self._local.get(telegram_id):
+            return True
+        if self.redis is None:
+            return False
+        try:
+            return bool(await self.redis.exists(f"{self.prefix}:{telegram_id}"))
+        except Exception:
+            logger.warning("Could not check the stickiness marker of %s", telegram_id, exc_info=True)
+            # Reading from the primary is always safe
+            return True
+
+    async def close(self) -> None:
+        """Release backend resources."""
+        if self.redis is not None:
+            await self.redis.aclose()
+
+
+def create_recent_writers() -> RecentWriters:
+    """Create the stickiness tracker selected in settings."""
+    redis = None
+    if replica_session is not None and settings.replica_stickiness_backend == "redis":
+        # Imported lazily: redis is only needed when this backend is selected
+        from redis.asyncio import Redis
+
+        redis = Redis.from_url(settings.redis_url)
+    return RecentWriters(settings.replica_stickiness, settings.replica_stickiness_cache_size, redis)
+
+
+recent_writers = create_recent_writers()
+
+
+async def mark_written(telegram_id: int) -> None:
+    """Keep the user's reads on the primary for a while after a write."""
+    if replica_session is not None:
+        await recent_writers.mark(telegram_id)
+
+
+async def get_read_session_maker(telegram_id: int) -> async_sessionmaker[AsyncSession] | None:
+    """Session factory for a read-only handler, or None to stay on the primary."""
+    if replica_session is None or await recent_writers.contains(telegram_id):
+        return None
+    return replica_session
+
+
+@event.listens_for(PrimarySession, "do_orm_execute")
+def _track_dml(state: ORMExecuteState) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info["wrote"] = True
+
+
+@event.listens_for(PrimarySession, "after_flush")
+def _track_flush(session: Session, flush_context: Any) -> None:
+    session.info["wrote"] = True
+
+
+@event.listens_for(PrimarySession, "after_commit")
+def _mark_writer(session: Session) -> None:
+    # "telegram_id" is set by DbSessionMiddleware for sessions serving an update
+    if session.info.pop("wrote", False) and "telegram_id" in session.info:
+        session.info["written_by"] = session.info["telegram_id"]
+
+
+@event.listens_for(PrimarySession, "after_rollback")
+def _forget_writes(session: Session) -> None:
+    session.info.pop("wrote", None)
+
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     """Provide an async database session."""
@@ -38,3 +229,39 @@ async def init_db() -> None:
 
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+
+
+def get_pool_stats(db_engine: AsyncEngine | None = None) -> dict[str, float]:
+    """Snapshot of connection pool usage (of the primary engine by default)."""
+    pool: InstrumentedPool = (db_engine or engine).sync_engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "waiting": pool.waiting,
+        "checkouts": pool.checkouts,
+        "wait_time": pool.wait_time,
+        "max_wait_time": pool.max_wait_time,
+    }
+
+
+async def log_pool_stats(interval: float) -> None:
+    """Periodically log connection pool usage."""
+    previous = get_pool_stats()
+    while True:
+        await asyncio.sleep(interval)
+        stats = get_pool_stats()
+        checkouts = stats["checkouts"] - previous["checkouts"]
+        wait_time = stats["wait_time"] - previous["wait_time"]
+        logger.info(
+            "DB pool: %d/%d checked out (overflow %d), %d waiting, "
+            "%d checkouts, avg wait %.1f ms, max wait %.1f ms",
+            stats["checked_out"],
+            stats["size"],
+            stats["overflow"],
+            stats["waiting"],
+            checkouts,
+            wait_time / checkouts * 1000 if checkouts else 0.0,
+            stats["max_wait_time"] * 1000,
+        )
+        previous = stats
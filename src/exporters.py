@@ -0,0 +1,230 @@
+"""Streaming export writers for the dream diary."""
+
+import asyncio
+import csv
+import gzip
+import io
+import json
+import zipfile
+from abc import ABC, abstractmethod
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from datetime import date
+from typing import TextIO
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.locales import locale
+from src.models import Dream
+
+EXPORT_CHUNK_SIZE = 500
+
+# Field order shared by the machine-readable formats (and the importer)
+EXPORT_FIELDS = ("id", "date", "title", "description", "tags", "notes")
+
+COMPRESSIONS = ("gz", "zip")
+
+
+def format_dream_for_export(dream: Dream, index: int, lang: str = "en") -> str:
+    """Format a single dream for text export."""
+    t = lambda key: locale.get(lang, f"export.{key}")
+
+    lines = [
+        "=" * 40,
+        locale.get(lang, "export.dream_header", index=index, date=dream.dream_date),
+        "-" * 40,
+        f"{t('field_title')}: {dream.title}",
+    ]
+
+    if dream.description:
+        lines.append(f"\n{t('field_description')}:\n{dream.description}")
+
+    if dream.tags:
+        lines.append(f"\n{t('field_tags')}: {dream.tags}")
+
+    if dream.notes:
+        lines.append(f"\n{t('field_notes')}:\n{dream.notes}")
+
+    lines.append("")
+    return "\n".join(lines)
+
+
+def dream_to_record(dream: Dream) -> dict[str, str | int]:
+    """Convert a dream into a flat record for machine-readable formats."""
+    return {
+        "id": dream.id,
+        "date": dream.dream_date.isoformat(),
+        "title": dream.title,
+        "description": dream.description,
+        "tags": dream.tags,
+        "notes": dream.notes,
+    }
+
+
+class ExportWriter(ABC):
+    """
+    Base class for streaming export formats.
+
+    Subclasses receive dreams in chunks and must write them straight to
+    the file without keeping them around.
+    """
+
+    name: str = ""
+    extension: str = ""
+
+    def __init__(self, file: TextIO, lang: str = "en") -> None:
+        self.file = file
+        self.lang = lang
+
+    def write_header(self, total: int) -> None:
+        """Write anything that precedes the dreams."""
+
+    @abstractmethod
+    def write_dreams(self, dreams: Sequence[Dream], start_index: int) -> None:
+        """Write a chunk of dreams; start_index is the 1-based index of the first one."""
+
+    def write_footer(self) -> None:
+        """Write anything that follows the dreams."""
+
+
+EXPORT_WRITERS: dict[str, type[ExportWriter]] = {}
+
+
+def register_writer(writer_class: type[ExportWriter]) -> type[ExportWriter]:
+    """Register an export format under its name."""
+    EXPORT_WRITERS[writer_class.name] = writer_class
+    return writer_class
+
+
+@register_writer
+class TextWriter(ExportWriter):
+    """Human-readable plain text export."""
+
+    name = "txt"
+    extension = "txt"
+
+    def write_header(self, total: int) -> None:
+        header = locale.get(self.lang, "export.header", date=date.today(), count=total)
+        self.file.write(f"{header}\n\n")
+
+    def write_dreams(self, dreams: Sequence[Dream], start_index: int) -> None:
+        chunk = [
+            format_dream_for_export(dream, index, self.lang)
+            for index, dream in enumerate(dreams, start=start_index)
+        ]
+        self.file.write("\n".join(chunk) + "\n")
+
+
+@register_writer
+class JsonLinesWriter(ExportWriter):
+    """One JSON object per line."""
+
+    name = "jsonl"
+    extension = "jsonl"
+
+    def write_dreams(self, dreams: Sequence[Dream], start_index: int) -> None:
+        for dream in dreams:
+            self.file.write(json.dumps(dream_to_record(dream), ensure_ascii=False) + "\n")
+
+
+@register_writer
+class CsvWriter(ExportWriter):
+    """Comma-separated values with a header row."""
+
+    name = "csv"
+    extension = "csv"
+
+    def __init__(self, file: TextIO, lang: str = "en") -> None:
+        super().__init__(file, lang)
+        self.writer = csv.DictWriter(file, fieldnames=EXPORT_FIELDS)
+
+    def write_header(self, total: int) -> None:
+        self.writer.writeheader()
+
+    def write_dreams(self, dreams: Sequence[Dream], start_index: int) -> None:
+        self.writer.writerows(dream_to_record(dream) for dream in dreams)
+
+
+@register_writer
+class MarkdownWriter(ExportWriter):
+    """Markdown document with a section per dream."""
+
+    name = "md"
+    extension = "md"
+
+    def write_header(self, total: int) -> None:
+        title, *rest = locale.get(
+            self.lang, "export.header", date=date.today(), count=total
+        ).split("\n")
+        self.file.write(f"# {title}\n\n" + "".join(f"{line}  \n" for line in rest) + "\n")
+
+    def write_dreams(self, dreams: Sequence[Dream], start_index: int) -> None:
+        t = lambda key: locale.get(self.lang, f"export.{key}")
+        for dream in dreams:
+            parts = [f"## {dream.dream_date} — {dream.title}\n"]
+            if dream.description:
+                parts.append(f"### {t('field_description')}\n\n{dream.description}\n")
+            if dream.tags:
+                parts.append(f"**{t('field_tags')}:** {dream.tags}\n")
+            if dream.notes:
+                parts.append(f"### {t('field_notes')}\n\n{dream.notes}\n")
+            self.file.write("\n".join(parts) + "\n")
+
+
+@contextmanager
+def open_export_file(path: str, inner_name: str, compression: str | None) -> Iterator[TextIO]:
+    """
+    Open an export destination for text writing.
+
+    Args:
+        path: File to create
+        inner_name: File name inside the archive when compression is "zip"
+        compression: None, "gz" or "zip"
+    """
+    if compression == "gz":
+        with gzip.open(path, "wt", encoding="utf-8", newline="") as file:
+            yield file
+    elif compression == "zip":
+        with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            with archive.open(inner_name, "w", force_zip64=True) as raw:
+                with io.TextIOWrapper(raw, encoding="utf-8", newline="") as file:
+                    yield file
+    else:
+        with open(path, "w", encoding="utf-8", newline="") as file:
+            yield file
+
+
+async def export_dreams(
+    session: AsyncSession,
+    writer: ExportWriter,
+    user_id: int,
+    total: int,
+) -> int:
+    """
+    Stream the user's dreams into an export writer chunk by chunk.
+
+    Rows are fetched through a server-side cursor, so only one chunk of
+    dreams is held in memory at a time. Chunks are formatted, compressed
+    and written in a worker thread to keep the event loop free.
+
+    Returns:
+        Number of exported dreams
+    """
+    writer.write_header(total)
+
+    stmt = (
+        select(Dream)
+        .where(Dream.user_id == user_id)
+        .order_by(Dream.dream_date.desc(), Dream.id.desc())
+        .execution_options(yield_per=EXPORT_CHUNK_SIZE, label="export.stream")
+    )
+
+    count = 0
+    result = await session.stream(stmt)
+    async for partition in result.scalars().partitions():
+        await asyncio.to_thread(writer.write_dreams, partition, count + 1)
+        count += len(partition)
+
+    writer.write_footer()
+    return count
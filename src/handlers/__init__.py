@@ -1,6 +1,6 @@
 from aiogram import Router
 
-from . import dreams, language, search, start
+from . import dreams, imports, language, search, start, tags
 
 
 def setup_routers() -> Router:
@@ -10,4 +10,6 @@ def setup_routers() -> Router:
     router.include_router(language.router)
     router.include_router(dreams.router)
     router.include_router(search.router)
+    router.include_router(tags.router)
+    router.include_router(imports.router)
     return router
@@ -1,25 +1,38 @@
+import os
+import tempfile
 from datetime import date
 from html import escape
-from io import BytesIO
 
-from aiogram import F, Router
+from aiogram import F, Router, flags
 from aiogram.filters import Command, CommandObject
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from aiogram.types import BufferedInputFile, CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
-from sqlalchemy import func, select
+from aiogram.types import CallbackQuery, FSInputFile, InlineKeyboardButton, InlineKeyboardMarkup, Message
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.buttons import Button
 from src.config import settings
-from src.database import async_session
-from src.handlers.start import get_user_language
+from src.database import mark_written
+from src.exporters import (
+    COMPRESSIONS,
+    EXPORT_WRITERS,
+    TextWriter,
+    export_dreams,
+    open_export_file,
+)
 from src.keyboards import (
     get_cancel_keyboard,
+    get_edit_field_keyboard,
     get_main_menu,
     get_skip_cancel_keyboard,
     get_today_cancel_keyboard,
 )
 from src.locales import locale
 from src.models import Dream, User
+from src.page_cache import RenderedPage, list_page_cache
+from src.repository import delete_dream, get_dream, update_dream_field
+from src.write_queue import dream_writer
 
 router = Router()
 
@@ -41,39 +54,16 @@ class EditDreamStates(StatesGroup):
     waiting_for_value = State()
 
 
-async def get_user_id_and_lang(telegram_id: int) -> tuple[int | None, str]:
-    """Get internal user ID and language by Telegram ID."""
-    async with async_session() as session:
-        stmt = select(User).where(User.telegram_id == telegram_id)
-        result = await session.execute(stmt)
-        user = result.scalar_one_or_none()
-        if user:
-            return user.id, user.language
-        return None, "en"
-
-
-async def get_dream_by_id(dream_id: int, user_id: int) -> Dream | None:
-    """Get dream by ID if it belongs to the user."""
-    async with async_session() as session:
-        stmt = select(Dream).where(Dream.id == dream_id, Dream.user_id == user_id)
-        result = await session.execute(stmt)
-        return result.scalar_one_or_none()
-
-
 # --- NEW DREAM ---
 
 
 @router.message(Command("new"))
-@router.message(F.text.in_([
-    locale.get("en", "buttons.new_dream"),
-    locale.get("ru", "buttons.new_dream"),
-]))
-async def cmd_new(message: Message, state: FSMContext) -> None:
+@router.message(Button("new_dream"))
+async def cmd_new(message: Message, state: FSMContext, user_id: int | None, lang: str) -> None:
     """Start creating a new dream entry."""
     if message.from_user is None:
         return
 
-    user_id, lang = await get_user_id_and_lang(message.from_user.id)
     if user_id is None:
         await message.answer(locale.get(lang, "not_registered"))
         return
@@ -110,10 +100,7 @@ async def process_title(message: Message, state: FSMContext) -> None:
 
 
 @router.message(NewDreamStates.waiting_for_description, Command("skip"))
-@router.message(NewDreamStates.waiting_for_description, F.text.in_([
-    locale.get("en", "buttons.skip"),
-    locale.get("ru", "buttons.skip"),
-]))
+@router.message(NewDreamStates.waiting_for_description, Button("skip"))
 async def skip_description(message: Message, state: FSMContext) -> None:
     """Skip description."""
     data = await state.get_data()
@@ -146,10 +133,7 @@ async def process_description(message: Message, state: FSMContext) -> None:
 
 
 @router.message(NewDreamStates.waiting_for_tags, Command("skip"))
-@router.message(NewDreamStates.waiting_for_tags, F.text.in_([
-    locale.get("en", "buttons.skip"),
-    locale.get("ru", "buttons.skip"),
-]))
+@router.message(NewDreamStates.waiting_for_tags, Button("skip"))
 async def skip_tags(message: Message, state: FSMContext) -> None:
     """Skip tags."""
     data = await state.get_data()
@@ -187,10 +171,7 @@ async def process_tags(message: Message, state: FSMContext) -> None:
 
 
 @router.message(NewDreamStates.waiting_for_notes, Command("skip"))
-@router.message(NewDreamStates.waiting_for_notes, F.text.in_([
-    locale.get("en", "buttons.skip"),
-    locale.get("ru", "buttons.skip"),
-]))
+@router.message(NewDreamStates.waiting_for_notes, Button("skip"))
 async def skip_notes(message: Message, state: FSMContext) -> None:
     """Skip notes."""
     data = await state.get_data()
@@ -223,13 +204,10 @@ async def process_notes(message: Message, state: FSMContext) -> None:
 
 
 @router.message(NewDreamStates.waiting_for_date, Command("today"))
-@router.message(NewDreamStates.waiting_for_date, F.text.in_([
-    locale.get("en", "buttons.today"),
-    locale.get("ru", "buttons.today"),
-]))
+@router.message(NewDreamStates.waiting_for_date, Button("today"))
 async def use_today_date(message: Message, state: FSMContext) -> None:
     """Use today's date."""
-    await state.update_data(dream_date=date.today())
+    await state.update_data(dream_date=date.today().isoformat())
     await save_new_dream(message, state)
 
 
@@ -249,7 +227,8 @@ async def process_date(message: Message, state: FSMContext) -> None:
         await message.answer(locale.get(lang, "new_dream.invalid_date"))
         return
 
-    await state.update_data(dream_date=dream_date)
+    # FSM data must stay JSON-serializable for Redis/Postgres storages
+    await state.update_data(dream_date=dream_date.isoformat())
     await save_new_dream(message, state)
 
 
@@ -259,49 +238,79 @@ async def save_new_dream(message: Message, state: FSMContext) -> None:
     lang = data.get("lang", "en")
     await state.clear()
 
-    async with async_session() as session:
-        dream = Dream(
-            user_id=data["user_id"],
-            title=data["title"],
-            description=data.get("description", ""),
-            tags=data.get("tags", ""),
-            notes=data.get("notes", ""),
-            dream_date=data.get("dream_date", date.today()),
-        )
-        session.add(dream)
-        await session.commit()
-        await session.refresh(dream)
+    dream_date = date.fromisoformat(data.get("dream_date", date.today().isoformat()))
+    # Coalesced with concurrent saves; returns only after the commit
+    dream_id = await dream_writer.submit(
+        user_id=data["user_id"],
+        title=data["title"],
+        description=data.get("description", ""),
+        tags=data.get("tags", ""),
+        notes=data.get("notes", ""),
+        dream_date=dream_date,
+    )
+    # Batched writes bypass the update's session, so flag the write here
+    await mark_written(message.from_user.id)
+    list_page_cache.bump(data["user_id"])
 
-        await message.answer(
-            locale.get(
-                lang,
-                "new_dream.saved",
-                id=dream.id,
-                title=escape(dream.title),
-                date=dream.dream_date,
-            ),
-            reply_markup=get_main_menu(lang),
-        )
+    await message.answer(
+        locale.get(
+            lang,
+            "new_dream.saved",
+            id=dream_id,
+            title=escape(data["title"]),
+            date=dream_date,
+        ),
+        reply_markup=get_main_menu(lang),
+    )
 
 
 # --- LIST DREAMS ---
 
 
-def build_pagination_keyboard(page: int, total_pages: int, lang: str = "en") -> InlineKeyboardMarkup | None:
-    """Build pagination keyboard."""
-    if total_pages <= 1:
-        return None
+# Keyset cursor encoded into callback data: "page:<page>:<direction>:<date>:<id>".
+# "n" fetches the page after the cursor, "p" the page before it.
+PageCursor = tuple[str, date, int]
+
+
+def encode_page_cursor(page: int, direction: str, dream: Dream) -> str:
+    """Encode a pagination cursor into callback data."""
+    return f"page:{page}:{direction}:{dream.dream_date.isoformat()}:{dream.id}"
+
+
+def decode_page_cursor(data: str) -> tuple[int, PageCursor | None]:
+    """
+    Decode pagination callback data.
+
+    Returns:
+        Page number and cursor, or (0, None) for legacy/malformed data
+    """
+    parts = data.split(":")
+    if len(parts) != 5 or parts[2] not in ("n", "p"):
+        return 0, None
+    try:
+        return int(parts[1]), (parts[2], date.fromisoformat(parts[3]), int(parts[4]))
+    except ValueError:
+        return 0, None
 
+
+def build_pagination_keyboard(
+    page: int,
+    dreams: list[Dream],
+    has_prev: bool,
+    has_next: bool,
+    lang: str = "en",
+) -> InlineKeyboardMarkup | None:
+    """Build pagination keyboard with keyset cursors."""
     buttons = []
-    if page > 0:
+    if has_prev:
         buttons.append(InlineKeyboardButton(
             text=locale.get(lang, "buttons.prev"),
-            callback_data=f"page:{page - 1}",
+            callback_data=encode_page_cursor(page - 1, "p", dreams[0]),
         ))
-    if page < total_pages - 1:
+    if has_next:
         buttons.append(InlineKeyboardButton(
             text=locale.get(lang, "buttons.next"),
-            callback_data=f"page:{page + 1}",
+            callback_data=encode_page_cursor(page + 1, "n", dreams[-1]),
         ))
 
     if not buttons:
@@ -311,91 +320,161 @@ def build_pagination_keyboard(page: int, total_pages: int, lang: str = "en") ->
 
 
 @router.message(Command("list"))
-@router.message(F.text.in_([
-    locale.get("en", "buttons.my_dreams"),
-    locale.get("ru", "buttons.my_dreams"),
-]))
-async def cmd_list(message: Message) -> None:
+@router.message(Button("my_dreams"))
+@flags.read_only
+async def cmd_list(
+    message: Message,
+    session: AsyncSession,
+    user_id: int | None,
+    lang: str,
+) -> None:
     """List user's dreams with pagination."""
     if message.from_user is None:
         return
 
-    user_id, lang = await get_user_id_and_lang(message.from_user.id)
     if user_id is None:
         await message.answer(locale.get(lang, "not_registered"))
         return
 
-    await show_dreams_page(message, user_id, lang, page=0)
+    await show_dreams_page(message, session, user_id, lang, page=0)
 
 
-async def show_dreams_page(
-    message: Message,
+async def fetch_dreams_page(
+    session: AsyncSession,
+    user_id: int,
+    cursor: PageCursor | None,
+    per_page: int,
+) -> tuple[list[Dream], int, bool]:
+    """
+    Fetch one page of dreams with a single keyset seek query.
+
+    Args:
+        session: Database session
+        user_id: Internal user ID
+        cursor: Keyset cursor, or None for the first page
+        per_page: Page size
+
+    Returns:
+        Dreams in display order, user's total dream count,
+        and whether more rows exist beyond the page in the seek direction
+    """
+    total_subquery = (
+        select(User.dream_count).where(User.id == user_id).scalar_subquery()
+    )
+    stmt = select(Dream, total_subquery).where(Dream.user_id == user_id)
+
+    key = tuple_(Dream.dream_date, Dream.id)
+    backwards = cursor is not None and cursor[0] == "p"
+    if cursor is not None:
+        _, cursor_date, cursor_id = cursor
+        if backwards:
+            stmt = stmt.where(key > tuple_(cursor_date, cursor_id))
+        else:
+            stmt = stmt.where(key < tuple_(cursor_date, cursor_id))
+
+    if backwards:
+        stmt = stmt.order_by(Dream.dream_date.asc(), Dream.id.asc())
+    else:
+        stmt = stmt.order_by(Dream.dream_date.desc(), Dream.id.desc())
+    # One extra row tells us whether another page exists in this direction
+    stmt = stmt.limit(per_page + 1).execution_options(label="dreams.list_page")
+
+    rows = (await session.execute(stmt)).all()
+
+    total = rows[0][1] if rows else 0
+    has_more = len(rows) > per_page
+    dreams = [row[0] for row in rows[:per_page]]
+    if backwards:
+        dreams.reverse()
+    return dreams, total, has_more
+
+
+async def render_dreams_page(
+    session: AsyncSession,
     user_id: int,
     lang: str,
     page: int,
-    edit_message: bool = False,
-) -> None:
-    """Show a page of dreams."""
+    cursor: PageCursor | None,
+) -> RenderedPage:
+    """Query and format a page of dreams; returns text and pagination keyboard."""
     per_page = settings.dreams_per_page
-    offset = page * per_page
-
-    async with async_session() as session:
-        # Get total count
-        count_stmt = select(func.count(Dream.id)).where(Dream.user_id == user_id)
-        total = (await session.execute(count_stmt)).scalar() or 0
-
-        if total == 0:
-            text = locale.get(lang, "list.empty")
-            if edit_message and hasattr(message, "edit_text"):
-                await message.edit_text(text)
-            else:
-                await message.answer(text)
-            return
 
-        total_pages = (total + per_page - 1) // per_page
+    dreams, total, has_more = await fetch_dreams_page(session, user_id, cursor, per_page)
+    if not dreams and cursor is not None:
+        # The cursor's neighbourhood was deleted meanwhile - restart from the top
+        page, cursor = 0, None
+        dreams, total, has_more = await fetch_dreams_page(session, user_id, None, per_page)
+    # Return the connection to the pool before talking to Telegram
+    await session.commit()
 
-        # Get dreams for current page
-        stmt = (
-            select(Dream)
-            .where(Dream.user_id == user_id)
-            .order_by(Dream.dream_date.desc(), Dream.id.desc())
-            .offset(offset)
-            .limit(per_page)
-        )
-        result = await session.execute(stmt)
-        dreams = result.scalars().all()
+    if not dreams:
+        return locale.get(lang, "list.empty"), None
 
-        # Format output
-        lines = [locale.get(lang, "list.header", page=page + 1, total_pages=total_pages) + "\n"]
-        for dream in dreams:
-            lines.append(f"<b>#{dream.id}</b> {dream.format_short()}")
+    if cursor is not None and cursor[0] == "p":
+        has_prev, has_next = has_more, True
+        if not has_prev:
+            page = 0
+    else:
+        has_prev, has_next = cursor is not None, has_more
 
-        lines.append(f"\n{locale.get(lang, 'list.total', count=total)}")
-        lines.append(locale.get(lang, "list.view_hint"))
+    total_pages = max((total + per_page - 1) // per_page, page + 1)
 
-        text = "\n".join(lines)
-        keyboard = build_pagination_keyboard(page, total_pages, lang)
+    # Format output
+    lines = [locale.get(lang, "list.header", page=page + 1, total_pages=total_pages) + "\n"]
+    for dream in dreams:
+        lines.append(f"<b>#{dream.id}</b> {dream.format_short()}")
 
-        if edit_message and hasattr(message, "edit_text"):
-            await message.edit_text(text, reply_markup=keyboard)
-        else:
-            await message.answer(text, reply_markup=keyboard)
+    lines.append(f"\n{locale.get(lang, 'list.total', count=total)}")
+    lines.append(locale.get(lang, "list.view_hint"))
+
+    text = "\n".join(lines)
+    return text, build_pagination_keyboard(page, dreams, has_prev, has_next, lang)
+
+
+async def show_dreams_page(
+    message: Message,
+    session: AsyncSession,
+    user_id: int,
+    lang: str,
+    page: int,
+    edit_message: bool = False,
+    cursor: PageCursor | None = None,
+) -> None:
+    """Show a page of dreams, rendered from the cache when possible."""
+    key, rendered = list_page_cache.get(user_id, lang, page, cursor)
+    if rendered is None:
+        rendered = await render_dreams_page(session, user_id, lang, page, cursor)
+        list_page_cache.set(key, rendered)
+    text, keyboard = rendered
+
+    if edit_message and hasattr(message, "edit_text"):
+        await message.edit_text(text, reply_markup=keyboard)
+    else:
+        await message.answer(text, reply_markup=keyboard)
 
 
 @router.callback_query(F.data.startswith("page:"))
-async def process_pagination(callback: CallbackQuery) -> None:
+@flags.read_only
+@flags.debounce
+async def process_pagination(
+    callback: CallbackQuery,
+    session: AsyncSession,
+    user_id: int | None,
+    lang: str,
+) -> None:
     """Handle pagination button press."""
     if callback.message is None or callback.from_user is None:
         return
 
-    page = int(callback.data.split(":")[1])
-    user_id, lang = await get_user_id_and_lang(callback.from_user.id)
+    page, cursor = decode_page_cursor(callback.data)
 
     if user_id is None:
         await callback.answer(locale.get(lang, "not_registered"))
         return
 
-    await show_dreams_page(callback.message, user_id, lang, page, edit_message=True)
+    await show_dreams_page(
+        callback.message, session, user_id, lang, page, edit_message=True, cursor=cursor
+    )
     await callback.answer()
 
 
@@ -403,12 +482,18 @@ async def process_pagination(callback: CallbackQuery) -> None:
 
 
 @router.message(Command("view"))
-async def cmd_view(message: Message, command: CommandObject) -> None:
+@flags.read_only
+async def cmd_view(
+    message: Message,
+    command: CommandObject,
+    session: AsyncSession,
+    user_id: int | None,
+    lang: str,
+) -> None:
     """View a specific dream by ID."""
     if message.from_user is None:
         return
 
-    user_id, lang = await get_user_id_and_lang(message.from_user.id)
     if user_id is None:
         await message.answer(locale.get(lang, "not_registered"))
         return
@@ -423,7 +508,8 @@ async def cmd_view(message: Message, command: CommandObject) -> None:
         await message.answer(locale.get(lang, "view.invalid_id"))
         return
 
-    dream = await get_dream_by_id(dream_id, user_id)
+    dream = await get_dream(session, dream_id, user_id)
+    await session.commit()
     if dream is None:
         await message.answer(locale.get(lang, "view.not_found", id=dream_id))
         return
@@ -435,12 +521,18 @@ async def cmd_view(message: Message, command: CommandObject) -> None:
 
 
 @router.message(Command("edit"))
-async def cmd_edit(message: Message, command: CommandObject, state: FSMContext) -> None:
+async def cmd_edit(
+    message: Message,
+    command: CommandObject,
+    state: FSMContext,
+    session: AsyncSession,
+    user_id: int | None,
+    lang: str,
+) -> None:
     """Start editing a dream."""
     if message.from_user is None:
         return
 
-    user_id, lang = await get_user_id_and_lang(message.from_user.id)
     if user_id is None:
         await message.answer(locale.get(lang, "not_registered"))
         return
@@ -455,7 +547,8 @@ async def cmd_edit(message: Message, command: CommandObject, state: FSMContext)
         await message.answer(locale.get(lang, "view.invalid_id"))
         return
 
-    dream = await get_dream_by_id(dream_id, user_id)
+    dream = await get_dream(session, dream_id, user_id)
+    await session.commit()
     if dream is None:
         await message.answer(locale.get(lang, "view.not_found", id=dream_id))
         return
@@ -463,20 +556,9 @@ async def cmd_edit(message: Message, command: CommandObject, state: FSMContext)
     await state.update_data(edit_dream_id=dream_id, user_id=user_id, lang=lang)
     await state.set_state(EditDreamStates.waiting_for_field)
 
-    keyboard = InlineKeyboardMarkup(
-        inline_keyboard=[
-            [InlineKeyboardButton(text=locale.get(lang, "edit.field_title"), callback_data="edit:title")],
-            [InlineKeyboardButton(text=locale.get(lang, "edit.field_description"), callback_data="edit:description")],
-            [InlineKeyboardButton(text=locale.get(lang, "edit.field_tags"), callback_data="edit:tags")],
-            [InlineKeyboardButton(text=locale.get(lang, "edit.field_notes"), callback_data="edit:notes")],
-            [InlineKeyboardButton(text=locale.get(lang, "edit.field_date"), callback_data="edit:dream_date")],
-            [InlineKeyboardButton(text=locale.get(lang, "edit.field_cancel"), callback_data="edit:cancel")],
-        ]
-    )
-
     await message.answer(
         locale.get(lang, "edit.header", id=dream_id, title=escape(dream.title)),
-        reply_markup=keyboard,
+        reply_markup=get_edit_field_keyboard(lang),
     )
 
 
@@ -512,7 +594,7 @@ async def process_edit_field_selection(callback: CallbackQuery, state: FSMContex
 
 
 @router.message(EditDreamStates.waiting_for_value)
-async def process_edit_value(message: Message, state: FSMContext) -> None:
+async def process_edit_value(message: Message, state: FSMContext, session: AsyncSession) -> None:
     """Process the new value for the field."""
     data = await state.get_data()
     lang = data.get("lang", "en")
@@ -541,20 +623,15 @@ async def process_edit_value(message: Message, state: FSMContext) -> None:
             await message.answer(locale.get(lang, "new_dream.invalid_date"))
             return
 
-    async with async_session() as session:
-        stmt = select(Dream).where(Dream.id == dream_id, Dream.user_id == user_id)
-        result = await session.execute(stmt)
-        dream = result.scalar_one_or_none()
-
-        if dream is None:
-            await message.answer(locale.get(lang, "edit.not_found"))
-            await state.clear()
-            return
-
-        setattr(dream, field, value)
-        await session.commit()
+    updated = await update_dream_field(session, dream_id, user_id, field, value)
+    await session.commit()
+    list_page_cache.bump(user_id)
 
     await state.clear()
+    if not updated:
+        await message.answer(locale.get(lang, "edit.not_found"))
+        return
+
     await message.answer(locale.get(lang, "edit.updated", id=dream_id))
 
 
@@ -562,12 +639,17 @@ async def process_edit_value(message: Message, state: FSMContext) -> None:
 
 
 @router.message(Command("delete"))
-async def cmd_delete(message: Message, command: CommandObject) -> None:
+async def cmd_delete(
+    message: Message,
+    command: CommandObject,
+    session: AsyncSession,
+    user_id: int | None,
+    lang: str,
+) -> None:
     """Delete a dream with confirmation."""
     if message.from_user is None:
         return
 
-    user_id, lang = await get_user_id_and_lang(message.from_user.id)
     if user_id is None:
         await message.answer(locale.get(lang, "not_registered"))
         return
@@ -582,7 +664,8 @@ async def cmd_delete(message: Message, command: CommandObject) -> None:
         await message.answer(locale.get(lang, "view.invalid_id"))
         return
 
-    dream = await get_dream_by_id(dream_id, user_id)
+    dream = await get_dream(session, dream_id, user_id)
+    await session.commit()
     if dream is None:
         await message.answer(locale.get(lang, "view.not_found", id=dream_id))
         return
@@ -615,12 +698,16 @@ async def cmd_delete(message: Message, command: CommandObject) -> None:
 
 
 @router.callback_query(F.data.startswith("delete:"))
-async def process_delete_confirmation(callback: CallbackQuery) -> None:
+async def process_delete_confirmation(
+    callback: CallbackQuery,
+    session: AsyncSession,
+    user_id: int | None,
+    lang: str,
+) -> None:
     """Handle delete confirmation."""
     if callback.message is None or callback.from_user is None:
         return
 
-    _, lang = await get_user_id_and_lang(callback.from_user.id)
     parts = callback.data.split(":")
     action = parts[1]
 
@@ -631,24 +718,19 @@ async def process_delete_confirmation(callback: CallbackQuery) -> None:
 
     if action == "confirm":
         dream_id = int(parts[2])
-        user_id, lang = await get_user_id_and_lang(callback.from_user.id)
 
         if user_id is None:
             await callback.answer(locale.get(lang, "not_registered"))
             return
 
-        async with async_session() as session:
-            stmt = select(Dream).where(Dream.id == dream_id, Dream.user_id == user_id)
-            result = await session.execute(stmt)
-            dream = result.scalar_one_or_none()
-
-            if dream is None:
-                await callback.message.edit_text(locale.get(lang, "delete.not_found"))
-                await callback.answer()
-                return
+        deleted = await delete_dream(session, dream_id, user_id)
+        await session.commit()
+        list_page_cache.bump(user_id)
 
-            await session.delete(dream)
-            await session.commit()
+        if not deleted:
+            await callback.message.edit_text(locale.get(lang, "delete.not_found"))
+            await callback.answer()
+            return
 
         await callback.message.edit_text(locale.get(lang, "delete.deleted", id=dream_id))
         await callback.answer()
@@ -656,78 +738,95 @@ async def process_delete_confirmation(callback: CallbackQuery) -> None:
 
 # --- EXPORT DREAMS ---
 
+# Bot API refuses uploads from bots larger than this
+MAX_EXPORT_FILE_SIZE = 50 * 1024 * 1024
 
-def format_dream_for_export(dream: Dream, index: int, lang: str = "en") -> str:
-    """Format a single dream for text export."""
-    t = lambda key: locale.get(lang, f"export.{key}")
-
-    lines = [
-        "=" * 40,
-        locale.get(lang, "export.dream_header", index=index, date=dream.dream_date),
-        "-" * 40,
-        f"{t('field_title')}: {dream.title}",
-    ]
-
-    if dream.description:
-        lines.append(f"\n{t('field_description')}:\n{dream.description}")
 
-    if dream.tags:
-        lines.append(f"\n{t('field_tags')}: {dream.tags}")
+def parse_export_args(args: str | None) -> tuple[str, str | None] | None:
+    """
+    Parse "/export [format] [compression]" arguments.
 
-    if dream.notes:
-        lines.append(f"\n{t('field_notes')}:\n{dream.notes}")
-
-    lines.append("")
-    return "\n".join(lines)
+    Returns:
+        Format name and compression, or None if arguments are invalid
+    """
+    export_format, compression = TextWriter.name, None
+    for arg in (args or "").lower().split():
+        if arg in EXPORT_WRITERS:
+            export_format = arg
+        elif arg in COMPRESSIONS:
+            compression = arg
+        else:
+            return None
+    return export_format, compression
 
 
 @router.message(Command("export"))
-@router.message(F.text.in_([
-    locale.get("en", "buttons.export"),
-    locale.get("ru", "buttons.export"),
-]))
-async def cmd_export(message: Message) -> None:
-    """Export all user's dreams to a text file."""
+@router.message(Button("export"))
+@flags.read_only
+@flags.throttle("export")
+@flags.single_flight("export")
+async def cmd_export(
+    message: Message,
+    session: AsyncSession,
+    user_id: int | None,
+    lang: str,
+    command: CommandObject | None = None,
+) -> None:
+    """Export all user's dreams to a file."""
     if message.from_user is None:
         return
 
-    user_id, lang = await get_user_id_and_lang(message.from_user.id)
     if user_id is None:
         await message.answer(locale.get(lang, "not_registered"))
         return
 
-    async with async_session() as session:
-        stmt = (
-            select(Dream)
-            .where(Dream.user_id == user_id)
-            .order_by(Dream.dream_date.desc(), Dream.id.desc())
+    parsed = parse_export_args(command.args if command else None)
+    if parsed is None:
+        await message.answer(
+            locale.get(
+                lang,
+                "export.usage",
+                formats=", ".join(EXPORT_WRITERS),
+                compressions=", ".join(COMPRESSIONS),
+            ),
+            reply_markup=get_main_menu(lang),
         )
-        result = await session.execute(stmt)
-        dreams = result.scalars().all()
+        return
+    export_format, compression = parsed
 
-    if not dreams:
+    stmt = select(User.dream_count).where(User.id == user_id)
+    total = (await session.execute(stmt)).scalar() or 0
+
+    if total == 0:
         await message.answer(
             locale.get(lang, "export.empty"),
             reply_markup=get_main_menu(lang),
         )
         return
 
-    # Build text content
-    header = locale.get(lang, "export.header", date=date.today(), count=len(dreams))
-    lines = [header, ""]
-
-    for i, dream in enumerate(dreams, start=1):
-        lines.append(format_dream_for_export(dream, i, lang))
+    writer_class = EXPORT_WRITERS[export_format]
+    inner_name = f"dreams_export_{date.today()}.{writer_class.extension}"
+    filename = f"{inner_name}.{compression}" if compression else inner_name
 
-    content = "\n".join(lines)
+    # Spool to a temp file that aiogram uploads from disk in chunks
+    fd, path = tempfile.mkstemp(prefix="dreams_export_")
+    os.close(fd)
+    try:
+        with open_export_file(path, inner_name, compression) as file:
+            count = await export_dreams(session, writer_class(file, lang), user_id, total)
+        await session.commit()
 
-    # Create file
-    file_bytes = content.encode("utf-8")
-    filename = f"dreams_export_{date.today()}.txt"
-    input_file = BufferedInputFile(file_bytes, filename=filename)
+        if os.path.getsize(path) > MAX_EXPORT_FILE_SIZE:
+            await message.answer(
+                locale.get(lang, "export.too_large"),
+                reply_markup=get_main_menu(lang),
+            )
+            return
 
-    await message.answer_document(
-        document=input_file,
-        caption=locale.get(lang, "export.caption", count=len(dreams)),
-        reply_markup=get_main_menu(lang),
-    )
+        await message.answer_document(
+            document=FSInputFile(path, filename=filename),
+            caption=locale.get(lang, "export.caption", count=count),
+            reply_markup=get_main_menu(lang),
+        )
+    finally:
+        os.unlink(path)
@@ -0,0 +1,168 @@
+import logging
+import os
+import tempfile
+import time
+
+from aiogram import F, Router
+from aiogram.exceptions import TelegramAPIError
+from aiogram.filters import Command
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.types import Message
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.importers import (
+    IMPORT_PARSERS,
+    MAX_IMPORT_BYTES,
+    MAX_IMPORT_RECORDS,
+    ImportTooLarge,
+    detect_format,
+    insert_dreams_batch,
+    iter_batches,
+    open_import_file,
+)
+from src.keyboards import get_cancel_keyboard, get_main_menu
+from src.locales import locale
+from src.page_cache import list_page_cache
+
+logger = logging.getLogger(__name__)
+
+router = Router()
+
+# Bot API refuses to serve files larger than this to bots
+MAX_IMPORT_FILE_SIZE = 20 * 1024 * 1024
+
+# Minimum delay between progress message edits
+PROGRESS_INTERVAL = 2.0
+
+
+class ImportStates(StatesGroup):
+    """States for importing dreams."""
+
+    waiting_for_file = State()
+
+
+@router.message(Command("import"))
+async def cmd_import(message: Message, state: FSMContext, user_id: int | None, lang: str) -> None:
+    """Ask for a file to import."""
+    if message.from_user is None:
+        return
+
+    if user_id is None:
+        await message.answer(locale.get(lang, "not_registered"))
+        return
+
+    await state.update_data(user_id=user_id, lang=lang)
+    await state.set_state(ImportStates.waiting_for_file)
+    await message.answer(
+        locale.get(lang, "import.prompt"),
+        reply_markup=get_cancel_keyboard(lang),
+    )
+
+
+async def show_progress(progress: Message, lang: str, stats: dict[str, int]) -> None:
+    """
+    Edit the progress message, ignoring Telegram errors.
+
+    Progress is cosmetic: a timeout or flood error here must not roll back
+    an import whose data is fine.
+    """
+    try:
+        await progress.edit_text(locale.get(
+            lang,
+            "import.progress",
+            processed=stats["processed"],
+            imported=stats["imported"],
+        ))
+    except TelegramAPIError as exc:
+        logger.warning("Could not update import progress: %s", exc)
+
+
+@router.message(ImportStates.waiting_for_file, F.document)
+async def process_import_file(message: Message, state: FSMContext, session: AsyncSession) -> None:
+    """Import dreams from an uploaded export file."""
+    data = await state.get_data()
+    lang = data.get("lang", "en")
+    user_id = data["user_id"]
+    document = message.document
+
+    parser_name, compression = detect_format(document.file_name or "")
+    if parser_name is None and compression != "zip":
+        await message.answer(locale.get(lang, "import.unsupported"))
+        return
+
+    if document.file_size and document.file_size > MAX_IMPORT_FILE_SIZE:
+        await message.answer(locale.get(lang, "import.too_large"))
+        return
+
+    await state.clear()
+    progress = await message.answer(
+        locale.get(lang, "import.progress", processed=0, imported=0)
+    )
+
+    stats = {"processed": 0, "imported": 0, "duplicates": 0, "invalid": 0}
+    fd, path = tempfile.mkstemp(prefix="dreams_import_")
+    os.close(fd)
+    try:
+        await message.bot.download(document, destination=path)
+
+        with open_import_file(path, compression) as (file, member_name):
+            if member_name is not None:
+                parser_name = detect_format(member_name)[0]
+            if parser_name is None:
+                await progress.edit_text(locale.get(lang, "import.unsupported"))
+                return
+
+            # One transaction for the whole file: either everything lands or
+            # nothing. The price is a primary connection and the user's row
+            # lock held until the file is done, progress edits included.
+            last_update = time.monotonic()
+            for batch in iter_batches(IMPORT_PARSERS[parser_name](file), stats):
+                inserted = await insert_dreams_batch(session, user_id, batch)
+                stats["processed"] += len(batch)
+                stats["imported"] += inserted
+                stats["duplicates"] += len(batch) - inserted
+
+                if time.monotonic() - last_update >= PROGRESS_INTERVAL:
+                    await show_progress(progress, lang, stats)
+                    last_update = time.monotonic()
+
+            await session.commit()
+            list_page_cache.bump(user_id)
+    except ImportTooLarge as exc:
+        logger.warning("Import aborted for user %s: %s", user_id, exc)
+        await session.rollback()
+        await progress.edit_text(locale.get(
+            lang,
+            "import.limit_exceeded",
+            records=MAX_IMPORT_RECORDS,
+            megabytes=MAX_IMPORT_BYTES // (1024 * 1024),
+        ))
+        return
+    except Exception:
+        logger.exception("Import failed for user %s", user_id)
+        await session.rollback()
+        await progress.edit_text(locale.get(lang, "import.failed"))
+        return
+    finally:
+        os.unlink(path)
+
+    await progress.edit_text(locale.get(
+        lang,
+        "import.done",
+        imported=stats["imported"],
+        duplicates=stats["duplicates"],
+        invalid=stats["invalid"],
+    ))
+    await message.answer(
+        locale.get(lang, "import.view_hint"),
+        reply_markup=get_main_menu(lang),
+    )
+
+
+@router.message(ImportStates.waiting_for_file)
+async def process_import_not_file(message: Message, state: FSMContext) -> None:
+    """Remind the user to send a file."""
+    data = await state.get_data()
+    lang = data.get("lang", "en")
+    await message.answer(locale.get(lang, "import.send_file"))
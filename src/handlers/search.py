@@ -1,14 +1,15 @@
 from html import escape
 
-from aiogram import F, Router
+from aiogram import Router, flags
 from aiogram.filters import Command, CommandObject
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import Message
-from sqlalchemy import or_, select
+from sqlalchemy import cast, func, literal_column, select
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database import async_session
-from src.handlers.dreams import get_user_id_and_lang
+from src.buttons import Button
 from src.keyboards import get_cancel_keyboard, get_main_menu
 from src.locales import locale
 from src.models import Dream
@@ -22,16 +23,12 @@ class SearchStates(StatesGroup):
     waiting_for_query = State()
 
 
-@router.message(F.text.in_([
-    locale.get("en", "buttons.search"),
-    locale.get("ru", "buttons.search"),
-]))
-async def btn_search(message: Message, state: FSMContext) -> None:
+@router.message(Button("search"))
+async def btn_search(message: Message, state: FSMContext, user_id: int | None, lang: str) -> None:
     """Handle Search button - ask for search query."""
     if message.from_user is None:
         return
 
-    user_id, lang = await get_user_id_and_lang(message.from_user.id)
     if user_id is None:
         await message.answer(locale.get(lang, "not_registered"))
         return
@@ -45,7 +42,9 @@ async def btn_search(message: Message, state: FSMContext) -> None:
 
 
 @router.message(SearchStates.waiting_for_query)
-async def process_search_query(message: Message, state: FSMContext) -> None:
+@flags.read_only
+@flags.throttle("search")
+async def process_search_query(message: Message, state: FSMContext, session: AsyncSession) -> None:
     """Process search query from button flow."""
     data = await state.get_data()
     lang = data.get("lang", "en")
@@ -58,16 +57,23 @@ async def process_search_query(message: Message, state: FSMContext) -> None:
     query = message.text.strip().lower()
 
     await state.clear()
-    await perform_search(message, user_id, query, lang)
+    await perform_search(message, session, user_id, query, lang)
 
 
 @router.message(Command("search"))
-async def cmd_search(message: Message, command: CommandObject) -> None:
+@flags.read_only
+@flags.throttle("search")
+async def cmd_search(
+    message: Message,
+    command: CommandObject,
+    session: AsyncSession,
+    user_id: int | None,
+    lang: str,
+) -> None:
     """Search dreams by keywords in title, description, and tags."""
     if message.from_user is None:
         return
 
-    user_id, lang = await get_user_id_and_lang(message.from_user.id)
     if user_id is None:
         await message.answer(locale.get(lang, "not_registered"))
         return
@@ -80,43 +86,120 @@ async def cmd_search(message: Message, command: CommandObject) -> None:
         return
 
     query = command.args.strip().lower()
-    await perform_search(message, user_id, query, lang)
+    await perform_search(message, session, user_id, query, lang)
 
 
-async def perform_search(message: Message, user_id: int, query: str, lang: str) -> None:
+# Text search configurations per interface language (see migration 004)
+SEARCH_CONFIGS = {"en": "english", "ru": "russian"}
+
+SEARCH_RESULTS_LIMIT = 20
+
+# Control characters mark highlighted words in ts_headline output so that the
+# snippet can be HTML-escaped before the markers become <b> tags
+_HIGHLIGHT_START = "\x02"
+_HIGHLIGHT_STOP = "\x03"
+_HEADLINE_OPTIONS = (
+    f'StartSel="{_HIGHLIGHT_START}", StopSel="{_HIGHLIGHT_STOP}", '
+    "MaxWords=20, MinWords=5, MaxFragments=2"
+)
+
+# Must match the ix_dreams_fuzzy_trgm index expression
+_fuzzy_document = Dream.title + literal_column("' '") + Dream.tags
+
+
+def format_snippet(snippet: str | None) -> str:
+    """Convert a ts_headline snippet into safe HTML with bold matches."""
+    if not snippet or _HIGHLIGHT_START not in snippet:
+        return ""
+    return (
+        escape(snippet)
+        .replace(_HIGHLIGHT_START, "<b>")
+        .replace(_HIGHLIGHT_STOP, "</b>")
+    )
+
+
+async def search_ranked(
+    session: AsyncSession,
+    user_id: int,
+    query: str,
+    lang: str,
+) -> list[tuple[Dream, str | None]]:
+    """Full-text search ordered by relevance, with highlighted snippets."""
+    config = cast(SEARCH_CONFIGS.get(lang, "english"), REGCONFIG)
+    ts_query = func.websearch_to_tsquery(config, query)
+
+    rank = func.ts_rank(Dream.search_vector, ts_query).label("rank")
+    ranked = (
+        select(Dream.id, rank)
+        .where(Dream.user_id == user_id, Dream.search_vector.bool_op("@@")(ts_query))
+        .order_by(rank.desc(), Dream.dream_date.desc(), Dream.id.desc())
+        .limit(SEARCH_RESULTS_LIMIT)
+        .subquery()
+    )
+
+    # Headlines are expensive, so they are only built for the top rows
+    snippet = func.ts_headline(
+        config,
+        func.concat_ws(" ", Dream.description, Dream.notes),
+        ts_query,
+        _HEADLINE_OPTIONS,
+    )
+    stmt = (
+        select(Dream, snippet)
+        .join(ranked, ranked.c.id == Dream.id)
+        .order_by(ranked.c.rank.desc(), Dream.dream_date.desc(), Dream.id.desc())
+        .execution_options(label="search.ranked")
+    )
+    result = await session.execute(stmt)
+    return [(dream, text) for dream, text in result.all()]
+
+
+async def search_fuzzy(
+    session: AsyncSession,
+    user_id: int,
+    query: str,
+) -> list[tuple[Dream, str | None]]:
+    """Trigram fallback for typos and partial words in titles and tags."""
+    similarity = func.word_similarity(query, _fuzzy_document)
+    stmt = (
+        select(Dream)
+        .where(Dream.user_id == user_id, _fuzzy_document.bool_op("%>")(query))
+        .order_by(similarity.desc(), Dream.dream_date.desc(), Dream.id.desc())
+        .limit(SEARCH_RESULTS_LIMIT)
+        .execution_options(label="search.fuzzy")
+    )
+    result = await session.execute(stmt)
+    return [(dream, None) for dream in result.scalars().all()]
+
+
+async def perform_search(
+    message: Message,
+    session: AsyncSession,
+    user_id: int,
+    query: str,
+    lang: str,
+) -> None:
     """Perform the actual search and display results."""
-    async with async_session() as session:
-        # Search in title, description, tags, and notes (case-insensitive)
-        search_pattern = f"%{query}%"
-        stmt = (
-            select(Dream)
-            .where(
-                Dream.user_id == user_id,
-                or_(
-                    Dream.title.ilike(search_pattern),
-                    Dream.description.ilike(search_pattern),
-                    Dream.tags.ilike(search_pattern),
-                    Dream.notes.ilike(search_pattern),
-                ),
-            )
-            .order_by(Dream.dream_date.desc(), Dream.id.desc())
-            .limit(20)
-        )
-        result = await session.execute(stmt)
-        dreams = result.scalars().all()
+    results = await search_ranked(session, user_id, query, lang)
+    if not results:
+        results = await search_fuzzy(session, user_id, query)
+    await session.commit()
 
-        if not dreams:
-            await message.answer(
-                locale.get(lang, "search.no_results", query=escape(query)),
-                reply_markup=get_main_menu(lang),
-            )
-            return
+    if not results:
+        await message.answer(
+            locale.get(lang, "search.no_results", query=escape(query)),
+            reply_markup=get_main_menu(lang),
+        )
+        return
 
-        lines = [locale.get(lang, "search.header", query=escape(query))]
-        for dream in dreams:
-            lines.append(f"<b>#{dream.id}</b> {dream.format_short()}")
+    lines = [locale.get(lang, "search.header", query=escape(query))]
+    for dream, snippet in results:
+        lines.append(f"<b>#{dream.id}</b> {dream.format_short()}")
+        highlighted = format_snippet(snippet)
+        if highlighted:
+            lines.append(f"<i>{highlighted}</i>")
 
-        lines.append(f"\n{locale.get(lang, 'search.found', count=len(dreams))}")
-        lines.append(f"\n{locale.get(lang, 'list.view_hint')}")
+    lines.append(f"\n{locale.get(lang, 'search.found', count=len(results))}")
+    lines.append(f"\n{locale.get(lang, 'list.view_hint')}")
 
-        await message.answer("\n".join(lines), reply_markup=get_main_menu(lang))
+    await message.answer("\n".join(lines), reply_markup=get_main_menu(lang))
@@ -0,0 +1,95 @@
+from html import escape
+
+from aiogram import Router, flags
+from aiogram.filters import Command, CommandObject
+from aiogram.types import Message
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.keyboards import get_main_menu
+from src.locales import locale
+from src.tags import get_dreams_by_tag, get_tag_cloud, normalize_tag
+
+router = Router()
+
+TAG_RESULTS_LIMIT = 20
+TAG_CLOUD_LIMIT = 50
+
+
+@router.message(Command("tag"))
+@flags.read_only
+async def cmd_tag(
+    message: Message,
+    command: CommandObject,
+    session: AsyncSession,
+    user_id: int | None,
+    lang: str,
+) -> None:
+    """List dreams carrying the given tag."""
+    if message.from_user is None:
+        return
+
+    if user_id is None:
+        await message.answer(locale.get(lang, "not_registered"))
+        return
+
+    name = normalize_tag(command.args or "")
+    if not name:
+        await message.answer(
+            locale.get(lang, "tags.usage"),
+            reply_markup=get_main_menu(lang),
+        )
+        return
+
+    dreams = await get_dreams_by_tag(session, user_id, name, TAG_RESULTS_LIMIT)
+    await session.commit()
+
+    if not dreams:
+        await message.answer(
+            locale.get(lang, "tags.not_found", tag=escape(name)),
+            reply_markup=get_main_menu(lang),
+        )
+        return
+
+    lines = [locale.get(lang, "tags.header", tag=escape(name))]
+    for dream in dreams:
+        lines.append(f"<b>#{dream.id}</b> {dream.format_short()}")
+
+    lines.append(f"\n{locale.get(lang, 'search.found', count=len(dreams))}")
+    lines.append(f"\n{locale.get(lang, 'list.view_hint')}")
+
+    await message.answer("\n".join(lines), reply_markup=get_main_menu(lang))
+
+
+@router.message(Command("tags"))
+@flags.read_only
+async def cmd_tags(
+    message: Message,
+    session: AsyncSession,
+    user_id: int | None,
+    lang: str,
+) -> None:
+    """Show the user's tag cloud."""
+    if message.from_user is None:
+        return
+
+    if user_id is None:
+        await message.answer(locale.get(lang, "not_registered"))
+        return
+
+    cloud = await get_tag_cloud(session, user_id, TAG_CLOUD_LIMIT)
+    await session.commit()
+
+    if not cloud:
+        await message.answer(
+            locale.get(lang, "tags.empty"),
+            reply_markup=get_main_menu(lang),
+        )
+        return
+
+    lines = [locale.get(lang, "tags.cloud_header")]
+    for name, usage in cloud:
+        lines.append(f"{escape(name)} ({usage})")
+
+    lines.append(f"\n{locale.get(lang, 'tags.cloud_hint')}")
+
+    await message.answer("\n".join(lines), reply_markup=get_main_menu(lang))
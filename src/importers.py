@@ -0,0 +1,341 @@
+"""Streaming parsers and batched inserts for importing dreams."""
+
+import csv
+import gzip
+import hashlib
+import io
+import json
+import re
+import zipfile
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date
+from pathlib import PurePath
+from typing import Any, BinaryIO, TextIO
+
+from sqlalchemy import Date, Integer, String, Text, bindparam, text, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.locales import locale
+from src.models import User
+from src.tags import parse_tags, set_dream_tags
+
+IMPORT_BATCH_SIZE = 500
+
+# One import runs in one transaction, so its size is bounded after
+# decompression as well (a small .gz can expand to gigabytes)
+MAX_IMPORT_BYTES = 256 * 1024 * 1024
+MAX_IMPORT_RECORDS = 200_000
+
+MAX_TITLE_LENGTH = 255
+MAX_TAGS_LENGTH = 500
+
+
+class ImportTooLarge(ValueError):
+    """The import file exceeds MAX_IMPORT_BYTES or MAX_IMPORT_RECORDS."""
+
+
+@dataclass(frozen=True, slots=True)
+class ImportedDream:
+    """A validated dream read from an import file."""
+
+    title: str
+    description: str
+    tags: str
+    notes: str
+    dream_date: date
+
+    @property
+    def dedup_key(self) -> bytes:
+        """SHA-256 of the fields that identify the same dream across imports."""
+        fields = [self.dream_date.isoformat(), self.title, self.description]
+        return hashlib.sha256(json.dumps(fields).encode()).digest()
+
+
+def validate_record(record: dict[str, Any]) -> ImportedDream | None:
+    """Validate a raw record; returns None if it cannot be imported."""
+    title = str(record.get("title") or "").strip()
+    tags = str(record.get("tags") or "").strip()
+    if not title or len(title) > MAX_TITLE_LENGTH or len(tags) > MAX_TAGS_LENGTH:
+        return None
+
+    try:
+        dream_date = date.fromisoformat(str(record.get("date") or "").strip())
+    except ValueError:
+        return None
+
+    return ImportedDream(
+        title=title,
+        description=str(record.get("description") or "").strip(),
+        tags=tags,
+        notes=str(record.get("notes") or "").strip(),
+        dream_date=dream_date,
+    )
+
+
+# --- PARSERS ---
+# Each parser yields raw records (None for unreadable entries) from a text stream
+
+
+def parse_jsonl(file: TextIO) -> Iterator[dict[str, Any] | None]:
+    """Parse JSON Lines as produced by the jsonl export."""
+    for line in file:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            yield None
+            continue
+        yield record if isinstance(record, dict) else None
+
+
+def parse_csv(file: TextIO) -> Iterator[dict[str, Any] | None]:
+    """Parse CSV as produced by the csv export."""
+    yield from csv.DictReader(file)
+
+
+_TEXT_BLOCK_START = "=" * 40
+_TEXT_HEADER_RULE = "-" * 40
+_TEXT_DATE = re.compile(r"\|\s*(\d{4}-\d{2}-\d{2})\s*$")
+
+
+def _export_labels(field: str) -> set[str]:
+    """Export field label in every loaded language."""
+    return {
+        locale.get(lang, f"export.field_{field}")
+        for lang in locale.translations
+    }
+
+
+def _parse_text_block(lines: list[str]) -> dict[str, Any] | None:
+    """Parse one "=====" delimited block of the txt export."""
+    if len(lines) < 3 or lines[1] != _TEXT_HEADER_RULE:
+        return None
+    match = _TEXT_DATE.search(lines[0])
+    if match is None:
+        return None
+
+    record: dict[str, Any] = {"date": match.group(1)}
+    title_prefixes = tuple(f"{label}: " for label in _export_labels("title"))
+    tags_prefixes = tuple(f"{label}: " for label in _export_labels("tags"))
+    section_headers = {
+        f"{label}:": field
+        for field in ("description", "notes")
+        for label in _export_labels(field)
+    }
+
+    field: str | None = None
+    sections: dict[str, list[str]] = {"description": [], "notes": []}
+    previous = ""
+    for line in lines[2:]:
+        if field is None and "title" not in record and line.startswith(title_prefixes):
+            record["title"] = line.split(": ", 1)[1]
+        elif not previous and line in section_headers:
+            field = section_headers[line]
+        elif not previous and line.startswith(tags_prefixes):
+            record["tags"] = line.split(": ", 1)[1]
+            field = None
+        elif field is not None:
+            sections[field].append(line)
+        previous = line
+
+    for name, section in sections.items():
+        record[name] = "\n".join(section).strip()
+    return record
+
+
+def parse_text(file: TextIO) -> Iterator[dict[str, Any] | None]:
+    """Parse the human-readable txt export in either language."""
+    block: list[str] | None = None
+    for raw_line in file:
+        line = raw_line.rstrip("\r\n")
+        if line == _TEXT_BLOCK_START:
+            if block is not None:
+                yield _parse_text_block(block)
+            block = []
+        elif block is not None:
+            block.append(line)
+    if block is not None:
+        yield _parse_text_block(block)
+
+
+IMPORT_PARSERS: dict[str, Callable[[TextIO], Iterator[dict[str, Any] | None]]] = {
+    "txt": parse_text,
+    "jsonl": parse_jsonl,
+    "csv": parse_csv,
+}
+
+
+def detect_format(filename: str) -> tuple[str | None, str | None]:
+    """
+    Detect the parser and compression from a file name.
+
+    Returns:
+        Parser name (None if unknown) and compression ("gz", "zip" or None).
+        For zip archives the parser is detected from the archived file name.
+    """
+    suffixes = [suffix.lstrip(".").lower() for suffix in PurePath(filename).suffixes]
+    compression = None
+    if suffixes and suffixes[-1] in ("gz", "zip"):
+        compression = suffixes.pop()
+    if compression != "zip" and suffixes and suffixes[-1] in IMPORT_PARSERS:
+        return suffixes[-1], compression
+    return None, compression
+
+
+class _LimitedReader(io.RawIOBase):
+    """Binary stream that raises ImportTooLarge after ``limit`` bytes."""
+
+    def __init__(self, raw: BinaryIO, limit: int) -> None:
+        self.raw = raw
+        self.limit = limit
+        self.total = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        count = self.raw.readinto(buffer)
+        self.total += count
+        if self.total > self.limit:
+            raise ImportTooLarge(f"More than {self.limit} bytes after decompression")
+        return count
+
+
+def _open_text(raw: BinaryIO) -> TextIO:
+    limited = io.BufferedReader(_LimitedReader(raw, MAX_IMPORT_BYTES))
+    return io.TextIOWrapper(limited, encoding="utf-8-sig", newline="")
+
+
+@contextmanager
+def open_import_file(path: str, compression: str | None) -> Iterator[tuple[TextIO, str | None]]:
+    """
+    Open an uploaded file for streaming text reads.
+
+    Reading past MAX_IMPORT_BYTES of (decompressed) data raises ImportTooLarge.
+
+    Yields:
+        Text stream and, for zip archives, the name of the archived file
+    """
+    if compression == "gz":
+        with gzip.open(path, "rb") as raw, _open_text(raw) as file:
+            yield file, None
+    elif compression == "zip":
+        with zipfile.ZipFile(path) as archive:
+            members = [info for info in archive.infolist() if not info.is_dir()]
+            if not members:
+                raise ValueError("Empty archive")
+            with archive.open(members[0]) as raw, _open_text(raw) as file:
+                yield file, members[0].filename
+    else:
+        with open(path, "rb") as raw, _open_text(raw) as file:
+            yield file, None
+
+
+def iter_batches(
+    records: Iterable[dict[str, Any] | None],
+    stats: dict[str, int],
+    size: int = IMPORT_BATCH_SIZE,
+) -> Iterator[list[ImportedDream]]:
+    """
+    Validate records and group them into batches, dropping in-file duplicates.
+
+    Raises ImportTooLarge after MAX_IMPORT_RECORDS records.
+
+    Args:
+        records: Raw records from a parser
+        stats: Counters updated in place ("invalid", "duplicates")
+        size: Batch size
+    """
+    # Digests keep memory per seen dream small and constant
+    seen: set[bytes] = set()
+    batch: list[ImportedDream] = []
+    for count, record in enumerate(records, start=1):
+        if count > MAX_IMPORT_RECORDS:
+            raise ImportTooLarge(f"More than {MAX_IMPORT_RECORDS} records")
+        dream = validate_record(record) if record is not None else None
+        if dream is None:
+            stats["invalid"] += 1
+            continue
+        key = dream.dedup_key
+        if key in seen:
+            stats["duplicates"] += 1
+            continue
+        seen.add(key)
+        batch.append(dream)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# Skips dreams that already exist for the user; there is no unique key to
+# target with ON CONFLICT, so NOT EXISTS seeks ix_dreams_user_id_dream_date_id
+_INSERT_BATCH = text(
+    """
+    INSERT INTO dreams (user_id, title, description, tags, notes, dream_date)
+    SELECT :user_id, v.title, v.description, v.tags, v.notes, v.dream_date
+    FROM unnest(:titles, :descriptions, :tags, :notes, :dates)
+        AS v(title, description, tags, notes, dream_date)
+    WHERE NOT EXISTS (
+        SELECT 1 FROM dreams AS d
+        WHERE d.user_id = :user_id
+          AND d.dream_date = v.dream_date
+          AND d.title = v.title
+          AND d.description = v.description
+    )
+    RETURNING id, tags
+    """
+).bindparams(
+    bindparam("titles", type_=ARRAY(String)),
+    bindparam("descriptions", type_=ARRAY(Text)),
+    bindparam("tags", type_=ARRAY(String)),
+    bindparam("notes", type_=ARRAY(Text)),
+    bindparam("dates", type_=ARRAY(Date)),
+).columns(id=Integer, tags=String).execution_options(label="import.insert_batch")
+
+
+async def insert_dreams_batch(
+    session: AsyncSession,
+    user_id: int,
+    batch: Sequence[ImportedDream],
+) -> int:
+    """
+    Insert a batch of dreams in one statement, skipping existing ones.
+
+    The caller owns the transaction and commits once for the whole import.
+
+    Returns:
+        Number of inserted dreams
+    """
+    result = await session.execute(
+        _INSERT_BATCH,
+        {
+            "user_id": user_id,
+            "titles": [dream.title for dream in batch],
+            "descriptions": [dream.description for dream in batch],
+            "tags": [dream.tags for dream in batch],
+            "notes": [dream.notes for dream in batch],
+            "dates": [dream.dream_date for dream in batch],
+        },
+    )
+    inserted = result.all()
+    if not inserted:
+        return 0
+
+    await set_dream_tags(
+        session,
+        user_id,
+        {row.id: parse_tags(row.tags) for row in inserted},
+        replace=False,
+    )
+    await session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(dream_count=User.dream_count + len(inserted))
+    )
+    return len(inserted)
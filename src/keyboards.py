@@ -1,4 +1,15 @@
-"""Keyboard layouts for the bot."""
+"""
+Keyboard layouts for the bot.
+
+The set of languages is fixed at startup, so every keyboard is built once
+per language at import and the same (frozen) object is returned on every
+reply. Prebuilt keyboards are registered so that BotSession can also send
+their serialized JSON from a cache.
+"""
+
+from collections.abc import Callable
+from functools import wraps
+from typing import TypeVar
 
 from aiogram.types import (
     InlineKeyboardButton,
@@ -8,9 +19,37 @@ from aiogram.types import (
     ReplyKeyboardRemove,
 )
 
-from src.locales import locale
+from src.locales import DEFAULT_LANGUAGE, locale
+
+Markup = TypeVar("Markup", InlineKeyboardMarkup, ReplyKeyboardMarkup, ReplyKeyboardRemove)
+
+# id() of every prebuilt keyboard; they live as long as the process
+_prebuilt_ids: set[int] = set()
+
+
+def _register(markup: Markup) -> Markup:
+    _prebuilt_ids.add(id(markup))
+    return markup
+
+
+def is_prebuilt(markup: object) -> bool:
+    """Whether a markup is one of the shared keyboards built at import."""
+    return id(markup) in _prebuilt_ids
+
+
+def prebuilt(builder: Callable[[str], Markup]) -> Callable[[str], Markup]:
+    """Build a keyboard for every loaded language now and serve it from a dict."""
+    keyboards = {lang: _register(builder(lang)) for lang in locale.translations}
+
+    @wraps(builder)
+    def get(lang: str = DEFAULT_LANGUAGE) -> Markup:
+        keyboard = keyboards.get(lang)
+        return keyboard if keyboard is not None else keyboards[DEFAULT_LANGUAGE]
+
+    return get
 
 
+@prebuilt
 def get_main_menu(lang: str = "en") -> ReplyKeyboardMarkup:
     """Get main menu keyboard."""
     t = lambda key: locale.get(lang, f"buttons.{key}")
@@ -33,6 +72,7 @@ def get_main_menu(lang: str = "en") -> ReplyKeyboardMarkup:
     )
 
 
+@prebuilt
 def get_skip_cancel_keyboard(lang: str = "en") -> ReplyKeyboardMarkup:
     """Get keyboard with Skip and Cancel buttons for multi-step forms."""
     t = lambda key: locale.get(lang, f"buttons.{key}")
@@ -48,6 +88,7 @@ def get_skip_cancel_keyboard(lang: str = "en") -> ReplyKeyboardMarkup:
     )
 
 
+@prebuilt
 def get_cancel_keyboard(lang: str = "en") -> ReplyKeyboardMarkup:
     """Get keyboard with only Cancel button (for required fields)."""
     t = lambda key: locale.get(lang, f"buttons.{key}")
@@ -60,6 +101,7 @@ def get_cancel_keyboard(lang: str = "en") -> ReplyKeyboardMarkup:
     )
 
 
+@prebuilt
 def get_today_cancel_keyboard(lang: str = "en") -> ReplyKeyboardMarkup:
     """Get keyboard with Today and Cancel buttons for date input."""
     t = lambda key: locale.get(lang, f"buttons.{key}")
@@ -75,18 +117,39 @@ def get_today_cancel_keyboard(lang: str = "en") -> ReplyKeyboardMarkup:
     )
 
 
-def get_language_keyboard() -> InlineKeyboardMarkup:
-    """Get language selection keyboard."""
+@prebuilt
+def get_edit_field_keyboard(lang: str = "en") -> InlineKeyboardMarkup:
+    """Get inline keyboard for choosing which dream field to edit."""
+    t = lambda key: locale.get(lang, f"edit.field_{key}")
     return InlineKeyboardMarkup(
         inline_keyboard=[
-            [
-                InlineKeyboardButton(text="English", callback_data="lang:en"),
-                InlineKeyboardButton(text="Русский", callback_data="lang:ru"),
-            ]
+            [InlineKeyboardButton(text=t("title"), callback_data="edit:title")],
+            [InlineKeyboardButton(text=t("description"), callback_data="edit:description")],
+            [InlineKeyboardButton(text=t("tags"), callback_data="edit:tags")],
+            [InlineKeyboardButton(text=t("notes"), callback_data="edit:notes")],
+            [InlineKeyboardButton(text=t("date"), callback_data="edit:dream_date")],
+            [InlineKeyboardButton(text=t("cancel"), callback_data="edit:cancel")],
         ]
     )
 
 
+_LANGUAGE_KEYBOARD = _register(InlineKeyboardMarkup(
+    inline_keyboard=[
+        [
+            InlineKeyboardButton(text="English", callback_data="lang:en"),
+            InlineKeyboardButton(text="Русский", callback_data="lang:ru"),
+        ]
+    ]
+))
+
+_REMOVE_KEYBOARD = _register(ReplyKeyboardRemove())
+
+
+def get_language_keyboard() -> InlineKeyboardMarkup:
+    """Get language selection keyboard."""
+    return _LANGUAGE_KEYBOARD
+
+
 def remove_keyboard() -> ReplyKeyboardRemove:
     """Remove reply keyboard."""
-    return ReplyKeyboardRemove()
+    return _REMOVE_KEYBOARD
@@ -1,24 +1,73 @@
 """Localization module for the bot."""
 
 import json
+import logging
+import re
+from collections.abc import Callable
 from pathlib import Path
+from string import Formatter
 from typing import Any
 
+logger = logging.getLogger(__name__)
+
+# Language whose catalog is complete by definition; others fall back to it
+DEFAULT_LANGUAGE = "en"
+
+# "{count}", "{dream.id}" and "{items[0]}" all need the "count"/"dream"/"items" argument
+_ARGUMENT_NAME = re.compile(r"[.\[]")
+
+
+def flatten(tree: dict[str, Any], prefix: str = "") -> dict[str, str]:
+    """Flatten nested translations into dotted keys ("buttons.new_dream")."""
+    flat: dict[str, str] = {}
+    for name, value in tree.items():
+        key = f"{prefix}{name}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{key}."))
+        elif isinstance(value, str):
+            flat[key] = value
+        else:
+            raise ValueError(f"Translation {key!r} must be a string or a section")
+    return flat
+
+
+def placeholders(template: str) -> frozenset[str]:
+    """Names of the format arguments a template uses."""
+    return frozenset(
+        _ARGUMENT_NAME.split(field)[0]
+        for _, field, _, _ in Formatter().parse(template)
+        if field is not None
+    )
+
 
 class LocaleManager:
     """Manages translations for multiple languages."""
 
     def __init__(self) -> None:
-        self.translations: dict[str, dict[str, Any]] = {}
+        # Flat catalog per language, already merged with the English fallback
+        self.translations: dict[str, dict[str, str]] = {}
+        # Bound str.format of each template that has placeholders
+        self._formatters: dict[str, dict[str, Callable[..., str]]] = {}
         self._load_translations()
 
     def _load_translations(self) -> None:
-        """Load all translation files from the locales directory."""
+        """Load, flatten and validate all translation files from the locales directory."""
         locales_dir = Path(__file__).parent
+        catalogs: dict[str, dict[str, str]] = {}
         for file_path in locales_dir.glob("*.json"):
-            lang_code = file_path.stem
             with open(file_path, encoding="utf-8") as f:
-                self.translations[lang_code] = json.load(f)
+                catalogs[file_path.stem] = flatten(json.load(f))
+
+        default = catalogs.get(DEFAULT_LANGUAGE, {})
+        for lang_code, catalog in catalogs.items():
+            validate_catalog(lang_code, catalog, default)
+            merged = {**default, **catalog}
+            self.translations[lang_code] = merged
+            self._formatters[lang_code] = {
+                key: template.format
+                for key, template in merged.items()
+                if "{" in template or "}" in template
+            }
 
     def get(self, lang: str, key: str, **kwargs: Any) -> str:
         """
@@ -30,35 +79,53 @@ class LocaleManager:
             **kwargs: Format arguments for the string
 
         Returns:
-            Translated string, or key if not found
+            Translated string (English if the language lacks it), or key if not found
         """
-        # Fallback to English if language not found
-        translations = self.translations.get(lang, self.translations.get("en", {}))
-
-        # Navigate through nested keys
-        value: Any = translations
-        for part in key.split("."):
-            if isinstance(value, dict):
-                value = value.get(part)
-            else:
-                value = None
-                break
-
+        if lang not in self.translations:
+            lang = DEFAULT_LANGUAGE
+        value = self.translations.get(lang, {}).get(key)
         if value is None:
             return key
 
-        if not isinstance(value, str):
-            return key
-
         # Apply format arguments if provided
         if kwargs:
-            try:
-                return value.format(**kwargs)
-            except KeyError:
-                return value
+            formatter = self._formatters[lang].get(key)
+            if formatter is not None:
+                try:
+                    return formatter(**kwargs)
+                except (KeyError, IndexError):
+                    return value
 
         return value
 
 
+def validate_catalog(lang: str, catalog: dict[str, str], default: dict[str, str]) -> None:
+    """
+    Check a language against the default one.
+
+    Missing keys are only logged (they fall back to English), while unknown
+    keys and mismatched placeholders are mistakes that fail at startup.
+    """
+    missing = default.keys() - catalog.keys()
+    if missing:
+        logger.warning(
+            "Locale %r lacks %d keys, English is used for: %s",
+            lang, len(missing), ", ".join(sorted(missing)),
+        )
+
+    unknown = catalog.keys() - default.keys()
+    if unknown:
+        raise ValueError(f"Locale {lang!r} has keys missing in English: {', '.join(sorted(unknown))}")
+
+    for key, template in catalog.items():
+        expected = placeholders(default[key])
+        actual = placeholders(template)
+        if actual != expected:
+            raise ValueError(
+                f"Locale {lang!r} key {key!r} uses placeholders {sorted(actual)}, "
+                f"English uses {sorted(expected)}"
+            )
+
+
 # Global instance
 locale = LocaleManager()
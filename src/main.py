@@ -5,13 +5,33 @@ import sys
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
-from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.base import BaseStorage
 from alembic import command
 from alembic.config import Config
 
+from src.bot_session import BotSession
 from src.config import settings
-from src.database import init_db
+from src.database import engine, init_db, log_pool_stats, recent_writers, replica_engine
 from src.handlers import setup_routers
+from src.metrics import (
+    HandlerMetricsMiddleware,
+    InstrumentedStorage,
+    UpdateMetricsMiddleware,
+    instrument_engine,
+)
+from src.middlewares import (
+    ButtonMiddleware,
+    DbSessionMiddleware,
+    IdentityMiddleware,
+    ReadReplicaMiddleware,
+    ThrottlingMiddleware,
+)
+from src.outgoing import send_throttler
+from src.storage import create_fsm_storage
+from src.throttling import RateLimiter, create_rate_limiter
+from src.tracing import TracingMiddleware, setup_tracing, shutdown_tracing, trace_engine
+from src.web import create_app, run_webhook, start_server
+from src.write_queue import dream_writer
 
 
 def setup_logging() -> None:
@@ -43,6 +63,49 @@ def run_migrations() -> None:
     command.upgrade(alembic_cfg, "head")
 
 
+def instrument_engines() -> None:
+    """Attach SQL tracing and metrics hooks to the database engines."""
+    for db_engine in (engine, replica_engine):
+        if db_engine is None:
+            continue
+        trace_engine(db_engine.sync_engine)
+        if settings.metrics_enabled:
+            instrument_engine(db_engine.sync_engine)
+
+
+def create_dispatcher(storage: BaseStorage, rate_limiter: RateLimiter | None = None) -> Dispatcher:
+    """
+    Create the dispatcher with all middlewares and routers.
+
+    Without a rate limiter no per-user throttling is applied.
+    """
+    if settings.metrics_enabled:
+        storage = InstrumentedStorage(storage)
+    dp = Dispatcher(storage=storage)
+
+    dp.update.outer_middleware(TracingMiddleware())
+    if settings.metrics_enabled:
+        dp.update.outer_middleware(UpdateMetricsMiddleware())
+    dp.update.outer_middleware(DbSessionMiddleware())
+    dp.update.outer_middleware(IdentityMiddleware())
+    dp.message.outer_middleware(ButtonMiddleware())
+    # Inner middlewares run once the handler is known, so they can read its flags
+    if rate_limiter is not None:
+        throttling = ThrottlingMiddleware(rate_limiter)
+        dp.message.middleware(throttling)
+        dp.callback_query.middleware(throttling)
+    dp.message.middleware(ReadReplicaMiddleware())
+    dp.callback_query.middleware(ReadReplicaMiddleware())
+    if settings.metrics_enabled:
+        dp.message.middleware(HandlerMetricsMiddleware())
+        dp.callback_query.middleware(HandlerMetricsMiddleware())
+
+    # Setup routers
+    router = setup_routers()
+    dp.include_router(router)
+    return dp
+
+
 async def main() -> None:
     """Initialize and start the bot."""
     logger.info("Starting Dream Diary Bot...")
@@ -53,24 +116,48 @@ async def main() -> None:
     logger.info("Database initialized")
 
     # Create bot instance
+    bot_session = BotSession()
+    bot_session.middleware(send_throttler)
     bot = Bot(
         token=settings.bot_token,
+        session=bot_session,
         default=DefaultBotProperties(parse_mode=ParseMode.HTML),
     )
 
-    # Create dispatcher with FSM storage
-    dp = Dispatcher(storage=MemoryStorage())
+    setup_tracing()
+    instrument_engines()
+    rate_limiter = create_rate_limiter()
+    dp = create_dispatcher(create_fsm_storage(), rate_limiter)
 
-    # Setup routers
-    router = setup_routers()
-    dp.include_router(router)
+    dream_writer.start()
+    pool_logger = None
+    if settings.db_pool_log_interval > 0:
+        pool_logger = asyncio.create_task(log_pool_stats(settings.db_pool_log_interval))
 
-    # Start polling
-    logger.info("Bot is starting polling...")
     try:
-        await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
+        if settings.run_mode == "webhook":
+            logger.info("Bot is starting in webhook mode...")
+            await run_webhook(bot, dp)
+        else:
+            # Polling needs no web server except to expose /metrics
+            web_runner = await start_server(create_app()) if settings.metrics_enabled else None
+            logger.info("Bot is starting polling...")
+            try:
+                await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
+            finally:
+                if web_runner is not None:
+                    await web_runner.cleanup()
     finally:
+        # Commit dreams still waiting in the write queue before exiting
+        await dream_writer.stop()
+        if pool_logger is not None:
+            pool_logger.cancel()
+        await rate_limiter.close()
+        await recent_writers.close()
+        # Stops the Postgres purge task / closes the Redis connection
+        await dp.storage.close()
         await bot.session.close()
+        shutdown_tracing()
 
 
 if __name__ == "__main__":
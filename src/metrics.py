@@ -0,0 +1,276 @@
+"""Prometheus metrics: handlers, updates, FSM, SQL, pool and caches."""
+
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from contextvars import ContextVar
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from aiogram.types import TelegramObject
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+from sqlalchemy import Delete, Insert, Select, Update, event
+from sqlalchemy.engine import Engine
+
+HANDLER_LATENCY = Histogram(
+    "bot_handler_duration_seconds",
+    "Time spent in a handler, including its database and Bot API calls",
+    ["handler"],
+)
+HANDLER_ERRORS = Counter(
+    "bot_handler_errors_total",
+    "Handlers that raised an exception",
+    ["handler"],
+)
+UPDATES = Counter(
+    "bot_updates_total",
+    "Updates processed, by type and whether a handler took them",
+    ["type", "handled"],
+)
+UPDATE_LATENCY = Histogram(
+    "bot_update_duration_seconds",
+    "Time to process an update, middlewares included",
+    ["type"],
+)
+FSM_TRANSITIONS = Counter(
+    "bot_fsm_transitions_total",
+    "Conversation state changes",
+    ["from_state", "to_state"],
+)
+THROTTLED = Counter(
+    "bot_throttled_total",
+    "Requests dropped by rate limits, debouncing or single-flight locks",
+    ["limit", "reason"],
+)
+SQL_LATENCY = Histogram(
+    "bot_sql_duration_seconds",
+    "Time to execute a SQL statement (first row for streamed results)",
+    ["statement"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+# State of the conversation when the current handler started
+_current_state: ContextVar[str | None] = ContextVar("current_state", default=None)
+
+
+def statement_label(context: Any, statement: str) -> str:
+    """
+    Label a statement for metrics.
+
+    An explicit ``label`` execution option wins; otherwise the label is the
+    verb and the target table, e.g. "select dreams" or "update users".
+    """
+    label = context.execution_options.get("label") if context is not None else None
+    if label:
+        return label
+
+    compiled = getattr(context, "compiled", None)
+    stmt = getattr(compiled, "statement", None)
+    if isinstance(stmt, (Insert, Update, Delete)):
+        # ORM statements are annotated subclasses, so don't rely on the class name
+        verb = "insert" if stmt.is_insert else "update" if stmt.is_update else "delete"
+        return f"{verb} {stmt.table.name}"
+    if isinstance(stmt, Select):
+        froms = stmt.get_final_froms()
+        source = froms[0] if froms else None
+        # Joins are labelled by their leftmost table
+        while source is not None and hasattr(source, "left"):
+            source = source.left
+        name = getattr(source, "name", None)
+        return f"select {name}" if name else "select"
+
+    # Textual SQL: keep only the keyword to bound label cardinality
+    words = statement.split(None, 1)
+    return words[0].lower() if words else "unknown"
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Time every statement executed through an engine.
+
+    A statement can be given a readable label with
+    ``.execution_options(label="dreams.list_page")``; otherwise it is
+    labelled by verb and first table.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop(conn, cursor, statement, parameters, context, executemany) -> None:
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        SQL_LATENCY.labels(statement_label(context, statement)).observe(elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context) -> None:
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+
+def _state_name(state: StateType) -> str:
+    if isinstance(state, State):
+        state = state.state
+    return state or "none"
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """Outer update middleware counting updates and timing their processing."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        update_type = getattr(event, "event_type", None) or "unknown"
+        started = time.perf_counter()
+        result = UNHANDLED
+        try:
+            result = await handler(event, data)
+            return result
+        finally:
+            UPDATE_LATENCY.labels(update_type).observe(time.perf_counter() - started)
+            UPDATES.labels(update_type, "false" if result is UNHANDLED else "true").inc()
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Inner middleware timing each handler by its function name."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        handler_object = data.get("handler")
+        name = getattr(getattr(handler_object, "callback", None), "__name__", "unknown")
+        token = _current_state.set(data.get("raw_state"))
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.labels(name).inc()
+            raise
+        finally:
+            HANDLER_LATENCY.labels(name).observe(time.perf_counter() - started)
+            _current_state.reset(token)
+
+
+class InstrumentedStorage(BaseStorage):
+    """FSM storage wrapper counting state transitions."""
+
+    def __init__(self, storage: BaseStorage) -> None:
+        self.storage = storage
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        from_state = _current_state.get() or "none"
+        to_state = _state_name(state)
+        if from_state != to_state:
+            FSM_TRANSITIONS.labels(from_state, to_state).inc()
+            _current_state.set(to_state)
+        await self.storage.set_state(key, state)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        return await self.storage.get_state(key)
+
+    async def set_data(self, key: StorageKey, data: dict[str, Any]) -> None:
+        await self.storage.set_data(key, data)
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        return await self.storage.get_data(key)
+
+    async def update_data(self, key: StorageKey, data: dict[str, Any]) -> dict[str, Any]:
+        return await self.storage.update_data(key, data)
+
+    async def close(self) -> None:
+        await self.storage.close()
+
+
+class StatsCollector(Collector):
+    """Expose connection pool, cache, write queue and send queue statistics at scrape time."""
+
+    def describe(self) -> list:
+        # Nothing to pre-register; keeps registration from running collect()
+        return []
+
+    def collect(self) -> Iterator[GaugeMetricFamily | CounterMetricFamily]:
+        # Imported here: these modules need settings and open engines
+        from src.database import engine, get_pool_stats, replica_engine
+        from src.middlewares.identity import identity_cache
+        from src.outgoing import Priority, send_throttler
+        from src.page_cache import list_page_cache
+        from src.write_queue import dream_writer
+
+        engines = {"primary": engine}
+        if replica_engine is not None:
+            engines["replica"] = replica_engine
+        gauges = {
+            name: GaugeMetricFamily(
+                f"bot_db_pool_{name}", f"Connection pool {name}", labels=["engine"]
+            )
+            for name in ("size", "checked_out", "overflow", "waiting")
+        }
+        checkouts = CounterMetricFamily(
+            "bot_db_pool_checkouts", "Connection checkouts", labels=["engine"]
+        )
+        wait_time = CounterMetricFamily(
+            "bot_db_pool_wait_seconds", "Time spent waiting for a connection", labels=["engine"]
+        )
+        for label, db_engine in engines.items():
+            pool = get_pool_stats(db_engine)
+            for name, gauge in gauges.items():
+                gauge.add_metric([label], pool[name])
+            checkouts.add_metric([label], pool["checkouts"])
+            wait_time.add_metric([label], pool["wait_time"])
+        yield from gauges.values()
+        yield checkouts
+        yield wait_time
+
+        hits = CounterMetricFamily("bot_cache_hits", "Cache hits", labels=["cache"])
+        misses = CounterMetricFamily("bot_cache_misses", "Cache misses", labels=["cache"])
+        size = GaugeMetricFamily("bot_cache_entries", "Cached entries", labels=["cache"])
+        hits.add_metric(["identity"], identity_cache.hits)
+        misses.add_metric(["identity"], identity_cache.misses)
+        size.add_metric(["identity"], len(identity_cache))
+        hits.add_metric(["list_pages"], list_page_cache.pages.hits)
+        misses.add_metric(["list_pages"], list_page_cache.pages.misses)
+        size.add_metric(["list_pages"], len(list_page_cache.pages))
+        yield hits
+        yield misses
+        yield size
+        cache_bytes = GaugeMetricFamily(
+            "bot_cache_bytes", "Approximate size of cached values", labels=["cache"]
+        )
+        cache_bytes.add_metric(["list_pages"], list_page_cache.pages.size)
+        yield cache_bytes
+
+        yield GaugeMetricFamily(
+            "bot_dream_write_queue_pending",
+            "New dreams waiting to be written",
+            value=dream_writer.pending,
+        )
+
+        queued = GaugeMetricFamily(
+            "bot_send_queue_pending", "Outgoing messages waiting for a send slot", labels=["lane"]
+        )
+        for lane in Priority:
+            queued.add_metric([lane.name.lower()], send_throttler.pending(lane))
+        yield queued
+        yield CounterMetricFamily(
+            "bot_send_retries", "Outgoing messages retried after 429 Too Many Requests",
+            value=send_throttler.retries,
+        )
+
+
+REGISTRY.register(StatsCollector())
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Render all metrics in the Prometheus text format with its content type."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,14 @@
+"""aiogram middlewares."""
+
+from .buttons import ButtonMiddleware
+from .identity import IdentityMiddleware
+from .session import DbSessionMiddleware, ReadReplicaMiddleware
+from .throttling import ThrottlingMiddleware
+
+__all__ = [
+    "ButtonMiddleware",
+    "DbSessionMiddleware",
+    "IdentityMiddleware",
+    "ReadReplicaMiddleware",
+    "ThrottlingMiddleware",
+]
@@ -0,0 +1,28 @@
+"""Resolve reply keyboard button presses once per message."""
+
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import Message, TelegramObject
+
+from src.buttons import resolve_button
+
+
+class ButtonMiddleware(BaseMiddleware):
+    """
+    Put the pressed button's action into handler data as "button".
+
+    One dict lookup covers every language, so Button filters only compare
+    action names instead of lists of labels.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        if isinstance(event, Message):
+            data["button"] = resolve_button(event.text)
+        return await handler(event, data)
@@ -0,0 +1,79 @@
+"""Cached user identity lookup injected into handler data."""
+
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, User as TelegramUser
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.cache import TTLCache
+from src.config import settings
+from src.models import User
+
+# telegram_id -> (internal user ID or None if unregistered, language)
+Identity = tuple[int | None, str]
+
+# Each process has its own cache, so a registration or language change made
+# through another process shows up here only when the entry expires.
+# Unregistered users expire quickly so that /start on any process takes
+# effect everywhere within seconds; language changes may take up to
+# IDENTITY_CACHE_TTL.
+identity_cache: TTLCache[int, Identity] = TTLCache(
+    maxsize=settings.identity_cache_size,
+    ttl=settings.identity_cache_ttl,
+)
+
+
+async def load_identity(session: AsyncSession, telegram_id: int) -> Identity:
+    """Load internal user ID and language by Telegram ID."""
+    stmt = (
+        select(User.id, User.language)
+        .where(User.telegram_id == telegram_id)
+        .execution_options(label="identity.load")
+    )
+    row = (await session.execute(stmt)).one_or_none()
+    if row is None:
+        return None, "en"
+    return row.id, row.language
+
+
+async def get_identity(session: AsyncSession, telegram_id: int) -> Identity:
+    """
+    Get internal user ID and language, served from cache when possible.
+
+    A miss reads through the update's session, so a handler that stays on
+    the primary reuses the same connection and transaction.
+    """
+    return await identity_cache.get_or_load(
+        telegram_id,
+        lambda: load_identity(session, telegram_id),
+        ttl_of=lambda identity: settings.identity_negative_ttl if identity[0] is None else None,
+    )
+
+
+def remember_identity(telegram_id: int, user_id: int, lang: str) -> None:
+    """Update the cache after a user registers or changes language."""
+    identity_cache.set(telegram_id, (user_id, lang))
+
+
+class IdentityMiddleware(BaseMiddleware):
+    """
+    Inject ``user_id`` and ``lang`` of the sender into handler data.
+
+    Must run after DbSessionMiddleware, whose session it uses on cache misses.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        from_user: TelegramUser | None = data.get("event_from_user")
+        if from_user is not None:
+            data["user_id"], data["lang"] = await get_identity(data["session"], from_user.id)
+        else:
+            data["user_id"], data["lang"] = None, "en"
+        return await handler(event, data)
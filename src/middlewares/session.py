@@ -0,0 +1,73 @@
+"""One database session per update, injected into handler data."""
+
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import TelegramObject, User as TelegramUser
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import async_session, get_read_session_maker
+
+
+class DbSessionMiddleware(BaseMiddleware):
+    """
+    Inject a ``session`` shared by everything that handles an update.
+
+    The session only checks out a connection on its first query, so updates
+    that never touch the database cost no pool checkout. Work still pending
+    when the handler returns is committed; an exception rolls it back.
+    Handlers that write should commit themselves before replying so that the
+    user is never told about a change that is not durable yet.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        async with async_session() as session:
+            from_user: TelegramUser | None = data.get("event_from_user")
+            if from_user is not None:
+                # Lets commits keep this user's reads on the primary for a while
+                session.info["telegram_id"] = from_user.id
+            data["session"] = session
+            result = await handler(event, data)
+            if session.in_transaction():
+                await session.commit()
+            return result
+
+
+class ReadReplicaMiddleware(BaseMiddleware):
+    """
+    Swap in a replica ``session`` for handlers flagged ``read_only``.
+
+    Users who wrote within the last REPLICA_STICKINESS seconds keep reading
+    from the primary so they always see their own changes. Without a
+    configured replica this does nothing.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        from_user: TelegramUser | None = data.get("event_from_user")
+        if not get_flag(data, "read_only") or from_user is None:
+            return await handler(event, data)
+
+        session_maker = await get_read_session_maker(from_user.id)
+        if session_maker is None:
+            return await handler(event, data)
+
+        # Release the primary connection (e.g. held since an identity lookup)
+        # instead of leaving it idle in transaction while the handler runs
+        primary: AsyncSession = data["session"]
+        if primary.in_transaction():
+            await primary.commit()
+
+        async with session_maker() as session:
+            return await handler(event, {**data, "session": session})
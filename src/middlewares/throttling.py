@@ -0,0 +1,103 @@
+"""Per-user rate limits, debouncing and single-flight handlers."""
+
+import math
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import CallbackQuery, Message, TelegramObject, User as TelegramUser
+
+from src.cache import TTLCache
+from src.config import settings
+from src.locales import DEFAULT_LANGUAGE, locale
+from src.metrics import THROTTLED
+from src.throttling import LIMITS, RateLimiter, debounce_limit
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    Keep a single user from monopolizing the bot and the database.
+
+    Runs as an inner middleware, once a handler has been chosen and before
+    it touches the database. Handler flags select the policy:
+
+    - ``@flags.throttle("search")`` takes a token from the user's "search"
+      bucket (see LIMITS); handlers without it share the "default" bucket
+    - ``@flags.debounce`` silently drops repeats that come faster than
+      ``pagination_debounce`` seconds (double taps on inline buttons)
+    - ``@flags.single_flight("export")`` lets a user run only one such
+      handler at a time
+    """
+
+    def __init__(self, limiter: RateLimiter) -> None:
+        self.limiter = limiter
+        # (telegram_id, bucket) pairs recently told that they are throttled
+        self._noticed: TTLCache[tuple[int, str], bool] = TTLCache(
+            maxsize=settings.throttle_notice_cache_size,
+            ttl=settings.throttle_notice_interval,
+        )
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        from_user: TelegramUser | None = data.get("event_from_user")
+        if from_user is None:
+            return await handler(event, data)
+
+        if get_flag(data, "debounce") and settings.pagination_debounce > 0:
+            handler_object: HandlerObject = data["handler"]
+            name = handler_object.callback.__name__
+            if await self.limiter.hit(
+                f"{from_user.id}:debounce:{name}", debounce_limit(settings.pagination_debounce)
+            ):
+                THROTTLED.labels(name, "debounce").inc()
+                if isinstance(event, CallbackQuery):
+                    await event.answer()
+                return None
+
+        bucket = get_flag(data, "throttle", default="default")
+        wait = await self.limiter.hit(f"{from_user.id}:{bucket}", LIMITS[bucket])
+        if wait:
+            THROTTLED.labels(bucket, "rate").inc()
+            await self._reject(
+                event, data, from_user.id, bucket, "throttle.too_many", seconds=math.ceil(wait)
+            )
+            return None
+
+        lock_name = get_flag(data, "single_flight")
+        if lock_name is None:
+            return await handler(event, data)
+
+        lock_key = f"{from_user.id}:{lock_name}"
+        token = await self.limiter.lock(lock_key, settings.export_lock_timeout)
+        if token is None:
+            THROTTLED.labels(lock_name, "busy").inc()
+            await self._reject(event, data, from_user.id, lock_name, "throttle.busy")
+            return None
+        try:
+            return await handler(event, data)
+        finally:
+            await self.limiter.unlock(lock_key, token)
+
+    async def _reject(
+        self,
+        event: TelegramObject,
+        data: dict[str, Any],
+        telegram_id: int,
+        bucket: str,
+        key: str,
+        **kwargs: Any,
+    ) -> None:
+        text = locale.get(data.get("lang", DEFAULT_LANGUAGE), key, **kwargs)
+        if isinstance(event, CallbackQuery):
+            # Callbacks must be answered anyway; the toast costs nothing extra
+            await event.answer(text)
+        elif isinstance(event, Message) and not self._noticed.get((telegram_id, bucket)):
+            # A flood of messages gets one reply, not one per message
+            self._noticed.set((telegram_id, bucket), True)
+            await event.answer(text)
@@ -1,7 +1,20 @@
 from datetime import date, datetime
 from html import escape
 
-from sqlalchemy import BigInteger, Date, DateTime, ForeignKey, String, Text, func
+from sqlalchemy import (
+    BigInteger,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+    func,
+    text,
+)
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 from src.locales import locale
@@ -21,6 +34,8 @@ class User(Base):
     id: Mapped[int] = mapped_column(primary_key=True)
     telegram_id: Mapped[int] = mapped_column(BigInteger, unique=True, index=True)
     language: Mapped[str] = mapped_column(String(5), default="en")
+    # Maintained incrementally on insert/delete so listing never has to COUNT(*)
+    dream_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         server_default=func.now(),
@@ -39,6 +54,14 @@ class Dream(Base):
     """Dream record model."""
 
     __tablename__ = "dreams"
+    __table_args__ = (
+        # Serves every per-user "ORDER BY dream_date DESC, id DESC" query
+        # (list, export, search) via a backward index scan
+        Index("ix_dreams_user_id_dream_date_id", "user_id", "dream_date", "id"),
+        Index("ix_dreams_search_vector", "search_vector", postgresql_using="gin"),
+        # ix_dreams_fuzzy_trgm (migration 004) needs pg_trgm and is kept out
+        # of the model; migrations/env.py hides it from autogenerate
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
@@ -51,6 +74,8 @@ class Dream(Base):
         DateTime(timezone=True),
         server_default=func.now(),
     )
+    # Maintained by the dreams_search_vector_trigger database trigger
+    search_vector: Mapped[str | None] = mapped_column(TSVECTOR, nullable=True, deferred=True)
 
     user: Mapped["User"] = relationship(back_populates="dreams")
 
@@ -83,3 +108,48 @@ class Dream(Base):
             escape(self.notes) if self.notes else empty,
         ]
         return "\n".join(lines)
+
+
+class Tag(Base):
+    """Normalized per-user tag."""
+
+    __tablename__ = "tags"
+    __table_args__ = (
+        UniqueConstraint("user_id", "name", name="uq_tags_user_id_name"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    name: Mapped[str] = mapped_column(String(100))
+
+    def __repr__(self) -> str:
+        return f"Tag(id={self.id}, name={self.name!r})"
+
+
+class DreamTag(Base):
+    """Association between dreams and tags."""
+
+    __tablename__ = "dream_tags"
+    __table_args__ = (
+        Index("ix_dream_tags_tag_id_dream_id", "tag_id", "dream_id"),
+    )
+
+    dream_id: Mapped[int] = mapped_column(
+        ForeignKey("dreams.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    tag_id: Mapped[int] = mapped_column(
+        ForeignKey("tags.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+
+class FsmState(Base):
+    """Conversation state row used by the Postgres FSM storage."""
+
+    __tablename__ = "fsm_states"
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    state: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    data: Mapped[dict] = mapped_column(JSONB, default=dict, server_default=text("'{}'::jsonb"))
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
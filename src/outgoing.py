@@ -0,0 +1,246 @@
+"""Outgoing Bot API rate limiting within Telegram's flood limits."""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Methods that count against the message limits
+_LIMITED_PREFIXES = ("Send", "Edit", "Copy", "Forward")
+
+
+class Priority(IntEnum):
+    """Lanes for outgoing messages; lower values are sent first."""
+
+    INTERACTIVE = 0
+    BULK = 1
+
+
+_priority: ContextVar[Priority] = ContextVar("send_priority", default=Priority.INTERACTIVE)
+
+
+@contextmanager
+def bulk_sends() -> Iterator[None]:
+    """
+    Send everything inside this block in the bulk lane.
+
+    Bulk messages (broadcasts, reminders) only get global send slots that
+    replies to users do not need, so a running job never delays them.
+    """
+    token = _priority.set(Priority.BULK)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class PriorityTokenBucket:
+    """
+    Token bucket whose waiters are served by priority, then arrival order.
+
+    Waiting requests are released by a single background task as tokens
+    become available.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(burst)
+        self.updated = clock()
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._order = itertools.count()
+        self._releaser: asyncio.Task[None] | None = None
+
+    def pending(self, priority: Priority) -> int:
+        """Requests of a priority waiting for a token."""
+        return sum(1 for p, _, future in self._waiters if p == priority and not future.done())
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, priority: Priority) -> None:
+        """Wait for a token."""
+        self._refill()
+        if not self._waiters and self.tokens >= 1:
+            self.tokens -= 1
+            return
+
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._order), future))
+        if self._releaser is None or self._releaser.done():
+            self._releaser = asyncio.create_task(self._release_waiters())
+        # A cancelled waiter stays in the heap and is skipped when its turn comes
+        await future
+
+    async def _release_waiters(self) -> None:
+        while self._waiters:
+            self._refill()
+            if self.tokens < 1:
+                await self.sleep((1 - self.tokens) / self.rate)
+                continue
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self.tokens -= 1
+                future.set_result(None)
+
+
+class ChatLimiter:
+    """
+    Per-chat token buckets that reserve slots ahead of time.
+
+    A bucket may go negative: each caller takes the next free slot and
+    sleeps until it comes, so messages to one chat keep their order.
+    At most ``maxsize`` chats are tracked; idle ones are forgotten first.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        maxsize: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.maxsize = maxsize
+        self.clock = clock
+        # chat_id -> (tokens, last refill time)
+        self._buckets: OrderedDict[Any, tuple[float, float]] = OrderedDict()
+
+    def reserve(self, chat_id: Any) -> float:
+        """Take the chat's next slot and return how long to wait for it."""
+        now = self.clock()
+        tokens, updated = self._buckets.get(chat_id, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate) - 1
+        self._store(chat_id, tokens, now)
+        return max(0.0, -tokens / self.rate)
+
+    def refund(self, chat_id: Any) -> None:
+        """Give back a reserved slot that its caller never used."""
+        entry = self._buckets.get(chat_id)
+        if entry is not None:
+            tokens, updated = entry
+            self._buckets[chat_id] = (min(self.burst, tokens + 1), updated)
+
+    def pause(self, chat_id: Any, seconds: float) -> None:
+        """Hold back the chat's next slot by at least ``seconds`` (after a 429)."""
+        now = self.clock()
+        tokens, updated = self._buckets.get(chat_id, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        self._store(chat_id, min(tokens, 1 - seconds * self.rate), now)
+
+    def _store(self, chat_id: Any, tokens: float, now: float) -> None:
+        self._buckets[chat_id] = (tokens, now)
+        self._buckets.move_to_end(chat_id)
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+
+
+class SendThrottler(BaseRequestMiddleware):
+    """
+    Bot session middleware keeping outgoing messages within flood limits.
+
+    Send/edit/copy/forward requests wait for a slot in their chat's bucket
+    (``bot_chat_rate`` per second) and then in the global bucket
+    (``bot_global_rate`` per second), where interactive replies go before
+    bulk jobs. A 429 response pauses the chat for ``retry_after`` seconds
+    and the request is retried up to ``bot_retry_attempts`` times.
+    Other methods (callback answers, getUpdates, ...) pass straight through.
+    ``clock`` and ``sleep`` let tests run it on virtual time.
+    """
+
+    def __init__(
+        self,
+        global_rate: float,
+        chat_rate: float,
+        chat_burst: int,
+        retry_attempts: int,
+        max_chats: int = 10000,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ) -> None:
+        self.global_bucket = PriorityTokenBucket(
+            global_rate, max(1, round(global_rate)), clock=clock, sleep=sleep
+        )
+        self.chats = ChatLimiter(chat_rate, chat_burst, max_chats, clock=clock)
+        self.sleep = sleep
+        self.retry_attempts = retry_attempts
+        self.retries = 0
+
+    def pending(self, priority: Priority) -> int:
+        """Requests of a priority waiting for a global send slot."""
+        return self.global_bucket.pending(priority)
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[Any],
+        bot: Bot,
+        method: TelegramMethod[Any],
+    ) -> Response[Any]:
+        if not type(method).__name__.startswith(_LIMITED_PREFIXES):
+            return await make_request(bot, method)
+
+        chat_id = getattr(method, "chat_id", None)
+        priority = _priority.get()
+        attempt = 0
+        while True:
+            delay = self.chats.reserve(chat_id) if chat_id is not None else 0.0
+            try:
+                if delay:
+                    await self.sleep(delay)
+                await self.global_bucket.acquire(priority)
+            except asyncio.CancelledError:
+                # Nothing was sent, so the chat must not pay for the slot
+                if chat_id is not None:
+                    self.chats.refund(chat_id)
+                raise
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as exc:
+                if attempt >= self.retry_attempts:
+                    raise
+                attempt += 1
+                self.retries += 1
+                logger.warning(
+                    "Flood control on %s to chat %s, retrying in %d s",
+                    type(method).__name__, chat_id, exc.retry_after,
+                )
+                if chat_id is not None:
+                    self.chats.pause(chat_id, exc.retry_after)
+                else:
+                    await self.sleep(exc.retry_after)
+
+
+send_throttler = SendThrottler(
+    global_rate=settings.bot_global_rate,
+    chat_rate=settings.bot_chat_rate,
+    chat_burst=settings.bot_chat_burst,
+    retry_attempts=settings.bot_retry_attempts,
+    max_chats=settings.bot_chat_cache_size,
+)
@@ -0,0 +1,89 @@
+"""Rendered /list pages cached per user until their dreams change."""
+
+import itertools
+import time
+from collections import OrderedDict
+from datetime import date
+
+from aiogram.types import InlineKeyboardMarkup
+
+from src.cache import SizedCache
+from src.config import settings
+
+# Text and inline keyboard of one rendered page
+RenderedPage = tuple[str, InlineKeyboardMarkup | None]
+
+# (user ID, version, language, page number, cursor)
+PageKey = tuple[int, int, str, int, tuple[str, date, int] | None]
+
+# Rough per-entry cost of the key, the tuple and the keyboard objects
+_ENTRY_OVERHEAD = 1024
+
+
+class PageCache:
+    """
+    Rendered pages keyed by user, language and pagination cursor.
+
+    Every user has a version that is part of the key. Writes bump it, so
+    pages rendered before the change are never served again and simply
+    age out of the LRU. Entries also expire after ``ttl`` seconds, which
+    bounds staleness from writes made by other bot processes.
+
+    Versions come from one process-wide counter and are forgotten ``ttl``
+    seconds after the last bump, when every page keyed by an older version
+    has expired too - so only users who wrote recently are tracked.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float) -> None:
+        self.ttl = ttl
+        self.pages: SizedCache[PageKey, RenderedPage] = SizedCache(max_bytes, ttl)
+        # user_id -> (expiry time, version), oldest bump first
+        self._versions: OrderedDict[int, tuple[float, int]] = OrderedDict()
+        self._counter = itertools.count(1)
+
+    def _version(self, user_id: int) -> int:
+        entry = self._versions.get(user_id)
+        if entry is None or entry[0] <= time.monotonic():
+            return 0
+        return entry[1]
+
+    def get(
+        self, user_id: int, lang: str, page: int, cursor: tuple | None
+    ) -> tuple[PageKey, RenderedPage | None]:
+        """
+        Get a rendered page if the user's dreams have not changed since.
+
+        Also returns the key to cache a freshly rendered page under, so a
+        write made while rendering is not masked by the new version.
+        """
+        key = (user_id, self._version(user_id), lang, page, cursor)
+        return key, self.pages.get(key)
+
+    def set(self, key: PageKey, rendered: RenderedPage) -> None:
+        """Cache a page rendered for a key returned by get()."""
+        if key[1] != self._version(key[0]):
+            # The user's dreams changed while the page was rendered
+            return
+        text, keyboard = rendered
+        size = len(text.encode()) + _ENTRY_OVERHEAD
+        if keyboard is not None:
+            size += sum(
+                len(button.text) + len(button.callback_data or "")
+                for row in keyboard.inline_keyboard
+                for button in row
+            )
+        self.pages.set(key, rendered, size)
+
+    def bump(self, user_id: int) -> None:
+        """Forget the user's cached pages after their dreams changed."""
+        now = time.monotonic()
+        self._versions[user_id] = (now + self.ttl, next(self._counter))
+        self._versions.move_to_end(user_id)
+        while self._versions:
+            user, (expires_at, _) = next(iter(self._versions.items()))
+            if expires_at > now:
+                break
+            del self._versions[user]
+
+
+list_page_cache = PageCache(settings.list_cache_bytes, settings.list_cache_ttl)
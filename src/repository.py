@@ -0,0 +1,124 @@
+"""Dream persistence: ownership-checked single-statement reads and writes."""
+
+from datetime import date
+from typing import Any
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models import Dream, User
+from src.tags import parse_tags, set_dream_tags
+
+# Core tables: ORM-enabled DML does not support RETURNING from a DML CTE
+dreams = Dream.__table__
+users = User.__table__
+
+# Fields that /edit may change
+EDITABLE_FIELDS = ("title", "description", "tags", "notes", "dream_date")
+
+
+async def get_dream(session: AsyncSession, dream_id: int, user_id: int) -> Dream | None:
+    """Get a dream by ID if it belongs to the user."""
+    stmt = select(Dream).where(Dream.id == dream_id, Dream.user_id == user_id)
+    result = await session.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+async def create_dream(
+    session: AsyncSession,
+    user_id: int,
+    title: str,
+    description: str,
+    tags: str,
+    notes: str,
+    dream_date: date,
+) -> int:
+    """
+    Insert a dream and bump the owner's dream counter in one statement.
+
+    Tag links are written afterwards if the dream has tags. The caller commits.
+
+    Returns:
+        ID of the new dream
+    """
+    inserted = (
+        insert(dreams)
+        .values(
+            user_id=user_id,
+            title=title,
+            description=description,
+            tags=tags,
+            notes=notes,
+            dream_date=dream_date,
+        )
+        .returning(dreams.c.id, dreams.c.user_id)
+        .cte("inserted")
+    )
+    stmt = (
+        update(users)
+        .where(users.c.id == inserted.c.user_id)
+        .values(dream_count=users.c.dream_count + 1)
+        .returning(inserted.c.id)
+    )
+    dream_id = (await session.execute(stmt)).scalar_one()
+
+    tag_names = parse_tags(tags)
+    if tag_names:
+        await set_dream_tags(session, user_id, {dream_id: tag_names}, replace=False)
+    return dream_id
+
+
+async def update_dream_field(
+    session: AsyncSession,
+    dream_id: int,
+    user_id: int,
+    field: str,
+    value: Any,
+) -> bool:
+    """
+    Update one field of the user's dream with UPDATE ... RETURNING.
+
+    Editing tags also re-links normalized tags. The caller commits.
+
+    Returns:
+        False if the dream does not exist or belongs to someone else
+    """
+    if field not in EDITABLE_FIELDS:
+        raise ValueError(f"Field {field!r} is not editable")
+
+    stmt = (
+        update(Dream)
+        .where(Dream.id == dream_id, Dream.user_id == user_id)
+        .values({field: value})
+        .returning(Dream.id)
+    )
+    if (await session.execute(stmt)).scalar_one_or_none() is None:
+        return False
+
+    if field == "tags":
+        await set_dream_tags(session, user_id, {dream_id: parse_tags(value)})
+    return True
+
+
+async def delete_dream(session: AsyncSession, dream_id: int, user_id: int) -> bool:
+    """
+    Delete the user's dream and decrement the dream counter in one statement.
+
+    Tag links go away through ON DELETE CASCADE. The caller commits.
+
+    Returns:
+        False if the dream does not exist or belongs to someone else
+    """
+    deleted = (
+        delete(dreams)
+        .where(dreams.c.id == dream_id, dreams.c.user_id == user_id)
+        .returning(dreams.c.id, dreams.c.user_id)
+        .cte("deleted")
+    )
+    stmt = (
+        update(users)
+        .where(users.c.id == deleted.c.user_id)
+        .values(dream_count=users.c.dream_count - 1)
+        .returning(deleted.c.id)
+    )
+    return (await session.execute(stmt)).scalar_one_or_none() is not None
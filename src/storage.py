@@ -0,0 +1,142 @@
+"""FSM storage backends."""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from sqlalchemy import case, delete, func, literal_column, null, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.config import settings
+from src.database import engine
+from src.models import FsmState
+
+logger = logging.getLogger(__name__)
+
+
+class PostgresStorage(BaseStorage):
+    """
+    FSM storage keeping conversation state in the fsm_states table.
+
+    Rows expire after ``ttl`` seconds of inactivity; expired rows are
+    ignored on read and deleted by a background purge task. Every call,
+    update_data() included, is one statement on one pooled connection.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        ttl: int,
+        purge_interval: int = 600,
+    ) -> None:
+        self.engine = engine
+        self.ttl = timedelta(seconds=ttl)
+        self.purge_interval = purge_interval
+        self.key_builder = DefaultKeyBuilder(with_destiny=True)
+        self._purge_task: asyncio.Task[None] | None = None
+
+    def _expires_at(self) -> datetime:
+        return datetime.now(timezone.utc) + self.ttl
+
+    def _ensure_purging(self) -> None:
+        if self._purge_task is None or self._purge_task.done():
+            self._purge_task = asyncio.create_task(self._purge_loop())
+
+    async def _purge_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.purge_interval)
+            try:
+                purged = await self.purge_expired()
+                if purged:
+                    logger.info("Purged %d abandoned FSM states", purged)
+            except Exception:
+                logger.exception("Failed to purge FSM states")
+
+    async def purge_expired(self) -> int:
+        """Delete expired rows and return how many were removed."""
+        async with self.engine.begin() as conn:
+            result = await conn.execute(
+                delete(FsmState).where(FsmState.expires_at <= func.now())
+            )
+            return result.rowcount
+
+    async def _upsert(self, key: StorageKey, column: str, value: Any, merge: bool = False) -> Any:
+        """
+        Write one column with a single INSERT ... ON CONFLICT and return the data.
+
+        The other column of a row that has already expired is reset, as if
+        the row had been purged. With ``merge`` the data is merged into the
+        stored dict instead of replacing it.
+        """
+        self._ensure_purging()
+        stmt = insert(FsmState).values(
+            key=self.key_builder.build(key), expires_at=self._expires_at(), **{column: value}
+        )
+        alive = FsmState.expires_at > func.now()
+        current = {
+            "state": case((alive, FsmState.state), else_=null()),
+            "data": case((alive, FsmState.data), else_=literal_column("'{}'::jsonb")),
+        }
+        new_value = stmt.excluded[column]
+        if merge:
+            new_value = current[column].op("||")(new_value)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[FsmState.key],
+            set_={**current, column: new_value, "expires_at": stmt.excluded.expires_at},
+        ).returning(FsmState.data)
+        async with self.engine.begin() as conn:
+            return (await conn.execute(stmt)).scalar_one()
+
+    async def _get(self, key: StorageKey, column: Any) -> Any:
+        stmt = select(column).where(
+            FsmState.key == self.key_builder.build(key),
+            FsmState.expires_at > func.now(),
+        )
+        async with self.engine.connect() as conn:
+            return (await conn.execute(stmt)).scalar_one_or_none()
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        await self._upsert(key, "state", state.state if isinstance(state, State) else state)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        return await self._get(key, FsmState.state)
+
+    async def set_data(self, key: StorageKey, data: dict[str, Any]) -> None:
+        await self._upsert(key, "data", data)
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        return dict(await self._get(key, FsmState.data) or {})
+
+    async def update_data(self, key: StorageKey, data: dict[str, Any]) -> dict[str, Any]:
+        # Merged on the server instead of a get_data() and a set_data() round trip
+        return dict(await self._upsert(key, "data", data, merge=True))
+
+    async def close(self) -> None:
+        if self._purge_task is not None:
+            self._purge_task.cancel()
+            self._purge_task = None
+
+
+def create_fsm_storage() -> BaseStorage:
+    """Create the FSM storage backend selected in settings."""
+    backend = settings.fsm_storage
+    ttl = settings.fsm_state_ttl
+
+    if backend == "memory":
+        return MemoryStorage()
+
+    if backend == "redis":
+        # Imported lazily: redis is only needed when this backend is selected
+        from aiogram.fsm.storage.redis import RedisStorage
+
+        return RedisStorage.from_url(settings.redis_url, state_ttl=ttl, data_ttl=ttl)
+
+    if backend == "postgres":
+        return PostgresStorage(engine, ttl)
+
+    raise ValueError(f"Unknown FSM storage backend: {backend!r}")
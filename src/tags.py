@@ -0,0 +1,132 @@
+"""Normalized tag storage helpers."""
+
+from sqlalchemy import Integer, String, bindparam, delete, func, select, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models import Dream, DreamTag, Tag
+
+MAX_TAG_LENGTH = 100
+
+# Tags and links are passed as arrays rather than one bind parameter per
+# row, so large import batches stay under Postgres's 32767 parameter limit.
+# The upsert returns IDs of both new and already existing tags
+_UPSERT_TAGS = text(
+    """
+    INSERT INTO tags (user_id, name)
+    SELECT :user_id, unnest(:names)
+    ON CONFLICT (user_id, name) DO UPDATE SET name = excluded.name
+    RETURNING name, id
+    """
+).bindparams(
+    bindparam("user_id", type_=Integer),
+    bindparam("names", type_=ARRAY(String)),
+).columns(name=String, id=Integer)
+
+_LINK_DREAM_TAGS = text(
+    """
+    INSERT INTO dream_tags (dream_id, tag_id)
+    SELECT * FROM unnest(:dream_ids, :tag_ids)
+    ON CONFLICT DO NOTHING
+    """
+).bindparams(
+    bindparam("dream_ids", type_=ARRAY(Integer)),
+    bindparam("tag_ids", type_=ARRAY(Integer)),
+)
+
+
+def normalize_tag(name: str) -> str:
+    """Normalize a single tag name (must match migration 005)."""
+    return name.strip().lower()[:MAX_TAG_LENGTH]
+
+
+def parse_tags(raw: str) -> list[str]:
+    """Split a comma-separated tags string into unique normalized names."""
+    names: list[str] = []
+    for part in raw.split(","):
+        name = normalize_tag(part)
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+async def set_dream_tags(
+    session: AsyncSession,
+    user_id: int,
+    dream_tags: dict[int, list[str]],
+    replace: bool = True,
+) -> None:
+    """
+    Replace the tag links of the given dreams.
+
+    Args:
+        session: Active session; the caller commits
+        user_id: Owner of the dreams
+        dream_tags: Normalized tag names per dream ID
+        replace: Drop existing links first (not needed for new dreams)
+    """
+    if not dream_tags:
+        return
+
+    if replace:
+        await session.execute(
+            delete(DreamTag).where(DreamTag.dream_id.in_(list(dream_tags)))
+        )
+
+    names = sorted({name for names in dream_tags.values() for name in names})
+    if not names:
+        return
+
+    result = await session.execute(_UPSERT_TAGS, {"user_id": user_id, "names": names})
+    tag_ids = dict(result.tuples().all())
+
+    links = [
+        (dream_id, tag_ids[name])
+        for dream_id, names in dream_tags.items()
+        for name in names
+    ]
+    await session.execute(
+        _LINK_DREAM_TAGS,
+        {
+            "dream_ids": [dream_id for dream_id, _ in links],
+            "tag_ids": [tag_id for _, tag_id in links],
+        },
+    )
+
+
+async def get_dreams_by_tag(
+    session: AsyncSession,
+    user_id: int,
+    name: str,
+    limit: int,
+) -> list[Dream]:
+    """Get the user's most recent dreams carrying a tag."""
+    stmt = (
+        select(Dream)
+        .join(DreamTag, DreamTag.dream_id == Dream.id)
+        .join(Tag, Tag.id == DreamTag.tag_id)
+        .where(Tag.user_id == user_id, Tag.name == normalize_tag(name))
+        .order_by(Dream.dream_date.desc(), Dream.id.desc())
+        .limit(limit)
+    )
+    result = await session.execute(stmt)
+    return list(result.scalars().all())
+
+
+async def get_tag_cloud(
+    session: AsyncSession,
+    user_id: int,
+    limit: int,
+) -> list[tuple[str, int]]:
+    """Get the user's most used tags with their dream counts."""
+    usage = func.count(DreamTag.dream_id).label("usage")
+    stmt = (
+        select(Tag.name, usage)
+        .join(DreamTag, DreamTag.tag_id == Tag.id)
+        .where(Tag.user_id == user_id)
+        .group_by(Tag.id, Tag.name)
+        .order_by(usage.desc(), Tag.name)
+        .limit(limit)
+    )
+    result = await session.execute(stmt)
+    return list(result.tuples().all())
@@ -0,0 +1,177 @@
+"""Per-user token buckets and locks, in memory or in Redis."""
+
+import secrets
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, NamedTuple
+
+from src.config import settings
+
+
+class Limit(NamedTuple):
+    """Token bucket: ``burst`` requests at once, refilled at ``rate`` per second."""
+
+    rate: float
+    burst: int
+
+
+# Buckets handlers can name with @flags.throttle(...); unflagged handlers use "default"
+LIMITS: dict[str, Limit] = {
+    "default": Limit(settings.throttle_default_rate, settings.throttle_default_burst),
+    "search": Limit(settings.throttle_search_rate, settings.throttle_search_burst),
+    "export": Limit(settings.throttle_export_rate, settings.throttle_export_burst),
+}
+
+
+def debounce_limit(interval: float) -> Limit:
+    """A single token that takes ``interval`` seconds to come back."""
+    return Limit(1 / interval, 1)
+
+
+class RateLimiter(ABC):
+    """Base class for rate limiter backends."""
+
+    @abstractmethod
+    async def hit(self, key: str, limit: Limit) -> float:
+        """
+        Take a token from the bucket under ``key``.
+
+        Returns:
+            0 if the request is allowed, otherwise seconds until it would be
+        """
+
+    @abstractmethod
+    async def lock(self, key: str, timeout: float) -> str | None:
+        """
+        Take an exclusive lock that expires after ``timeout`` seconds.
+
+        Returns:
+            Token identifying this holder, or None if the lock is held
+        """
+
+    @abstractmethod
+    async def unlock(self, key: str, token: str) -> None:
+        """Release a lock taken with lock(), unless it expired and was taken again."""
+
+    async def close(self) -> None:
+        """Release backend resources."""
+
+
+class MemoryRateLimiter(RateLimiter):
+    """
+    Rate limiter for a single process.
+
+    At most ``maxsize`` buckets are kept; the least recently used ones are
+    dropped, which only means those users start again with a full bucket.
+    """
+
+    def __init__(self, maxsize: int = 10000) -> None:
+        self.maxsize = maxsize
+        # key -> (tokens, last refill time)
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        # key -> (lock expiry time, holder token)
+        self._locks: dict[str, tuple[float, str]] = {}
+
+    async def hit(self, key: str, limit: Limit) -> float:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (limit.burst, now))
+        tokens = min(limit.burst, tokens + (now - updated) * limit.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / limit.rate
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return wait
+
+    async def lock(self, key: str, timeout: float) -> str | None:
+        now = time.monotonic()
+        held = self._locks.get(key)
+        if held is not None and held[0] > now:
+            return None
+        token = secrets.token_hex(8)
+        self._locks[key] = (now + timeout, token)
+        return token
+
+    async def unlock(self, key: str, token: str) -> None:
+        held = self._locks.get(key)
+        if held is not None and held[1] == token:
+            del self._locks[key]
+
+
+# Same algorithm as MemoryRateLimiter.hit, atomic on the Redis server.
+# The wait is returned as a string because Lua numbers become integers.
+_HIT_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or burst
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + (now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+return tostring(wait)
+"""
+
+# Delete a lock only if this holder still owns it
+_UNLOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisRateLimiter(RateLimiter):
+    """Rate limiter shared by all processes through Redis."""
+
+    def __init__(self, redis: Any, prefix: str = "throttle") -> None:
+        self.redis = redis
+        self.prefix = prefix
+        self._hit = redis.register_script(_HIT_SCRIPT)
+        self._unlock = redis.register_script(_UNLOCK_SCRIPT)
+
+    async def hit(self, key: str, limit: Limit) -> float:
+        wait = await self._hit(keys=[f"{self.prefix}:{key}"], args=[limit.rate, limit.burst])
+        return float(wait)
+
+    async def lock(self, key: str, timeout: float) -> str | None:
+        token = secrets.token_hex(8)
+        acquired = await self.redis.set(
+            f"{self.prefix}:lock:{key}", token, nx=True, px=int(timeout * 1000)
+        )
+        return token if acquired else None
+
+    async def unlock(self, key: str, token: str) -> None:
+        await self._unlock(keys=[f"{self.prefix}:lock:{key}"], args=[token])
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+def create_rate_limiter() -> RateLimiter:
+    """Create the rate limiter backend selected in settings."""
+    backend = settings.throttle_backend
+
+    if backend == "memory":
+        return MemoryRateLimiter(settings.throttle_memory_buckets)
+
+    if backend == "redis":
+        # Imported lazily: redis is only needed when this backend is selected
+        from redis.asyncio import Redis
+
+        return RedisRateLimiter(Redis.from_url(settings.redis_url))
+
+    raise ValueError(f"Unknown throttle backend: {backend!r}")
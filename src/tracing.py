@@ -0,0 +1,203 @@
+"""Opt-in per-update tracing: trace IDs, SQL statement log and OpenTelemetry spans."""
+
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, TextIO
+from uuid import uuid4
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, User as TelegramUser
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.config import settings
+from src.metrics import statement_label
+
+logger = logging.getLogger(__name__)
+
+# Longest statement text included in a slow query warning
+MAX_LOGGED_STATEMENT = 1000
+
+
+@dataclass(slots=True)
+class Trace:
+    """SQL activity of the update being processed."""
+
+    trace_id: str
+    telegram_id: int | None
+    statements: int = 0
+    sql_time: float = 0.0
+    span: Any = field(default=None)
+
+
+current_trace: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+
+# OpenTelemetry tracer, set up by setup_tracing() when an exporter is configured
+_tracer: Any = None
+_tracer_provider: Any = None
+# Span file of the "file" exporter, closed by shutdown_tracing()
+_trace_file: TextIO | None = None
+
+
+def setup_tracing() -> None:
+    """Create the OpenTelemetry tracer if an exporter is configured."""
+    global _tracer, _tracer_provider, _trace_file
+    if not settings.trace_enabled or settings.otel_exporter == "none":
+        return
+
+    # Imported lazily: OpenTelemetry is only needed when exporting spans
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+    if settings.otel_exporter == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        exporter = OTLPSpanExporter(endpoint=settings.otel_endpoint)
+    else:
+        _trace_file = open(settings.otel_file, "a", encoding="utf-8")
+        exporter = ConsoleSpanExporter(
+            out=_trace_file,
+            formatter=lambda span: span.to_json(indent=None) + "\n",
+        )
+
+    _tracer_provider = TracerProvider(
+        resource=Resource.create({"service.name": "dream-diary-bot"})
+    )
+    _tracer_provider.add_span_processor(BatchSpanProcessor(exporter))
+    _tracer = _tracer_provider.get_tracer(__name__)
+    logger.info("Exporting traces via %s", settings.otel_exporter)
+
+
+def shutdown_tracing() -> None:
+    """Flush spans that are still buffered and close the span file."""
+    global _trace_file
+    if _tracer_provider is not None:
+        _tracer_provider.shutdown()
+    if _trace_file is not None:
+        _trace_file.close()
+        _trace_file = None
+
+
+def _start_span(name: str, parent: Any, attributes: dict[str, Any]) -> Any:
+    if _tracer is None:
+        return None
+    from opentelemetry import trace
+
+    context = trace.set_span_in_context(parent) if parent is not None else None
+    return _tracer.start_span(name, context=context, attributes=attributes)
+
+
+def trace_engine(engine: Engine) -> None:
+    """
+    Log SQL statements issued through an engine.
+
+    Every statement run while tracing an update is logged with its trace ID,
+    duration and row count. Statements slower than SLOW_QUERY_MS are logged
+    as warnings whether or not tracing is enabled.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany) -> None:
+        trace = current_trace.get()
+        span = None
+        if trace is not None and trace.span is not None:
+            span = _start_span(
+                f"sql {statement_label(context, statement)}",
+                trace.span,
+                {"db.system": "postgresql", "db.statement": statement},
+            )
+        conn.info.setdefault("trace_start", []).append((time.perf_counter(), span))
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop(conn, cursor, statement, parameters, context, executemany) -> None:
+        started, span = conn.info["trace_start"].pop()
+        elapsed = time.perf_counter() - started
+        label = statement_label(context, statement)
+        rows = cursor.rowcount
+        trace = current_trace.get()
+
+        if span is not None:
+            span.set_attribute("db.rows", rows)
+            span.end()
+
+        if trace is not None:
+            trace.statements += 1
+            trace.sql_time += elapsed
+            if settings.trace_enabled:
+                logger.info(
+                    "[%s] SQL %s: %.1f ms, %d rows", trace.trace_id, label, elapsed * 1000, rows
+                )
+
+        if settings.slow_query_ms and elapsed * 1000 >= settings.slow_query_ms:
+            logger.warning(
+                "[%s] Slow SQL %s: %.1f ms, %d rows, user %s\n%s",
+                trace.trace_id if trace else "-",
+                label,
+                elapsed * 1000,
+                rows,
+                trace.telegram_id if trace else "-",
+                statement[:MAX_LOGGED_STATEMENT],
+            )
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context) -> None:
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("trace_start"):
+            _, span = conn.info["trace_start"].pop()
+            if span is not None:
+                span.record_exception(exception_context.original_exception)
+                span.end()
+
+
+class TracingMiddleware(BaseMiddleware):
+    """
+    Outer update middleware giving each update a trace ID.
+
+    With TRACE_ENABLED the update's start, end and SQL totals are logged and,
+    if an exporter is configured, an OpenTelemetry span wraps the update.
+    Slow query warnings are attributed to the update in either case.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        from_user: TelegramUser | None = data.get("event_from_user")
+        update_type = getattr(event, "event_type", None) or "unknown"
+        trace = Trace(uuid4().hex[:16], from_user.id if from_user else None)
+        trace.span = _start_span(
+            f"telegram {update_type}",
+            None,
+            {"telegram.update_id": getattr(event, "update_id", 0), "telegram.user_id": trace.telegram_id or 0},
+        )
+        if trace.span is not None:
+            # Log lines then match the exported trace
+            trace.trace_id = format(trace.span.get_span_context().trace_id, "032x")
+        data["trace_id"] = trace.trace_id
+
+        token = current_trace.set(trace)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            current_trace.reset(token)
+            elapsed = time.perf_counter() - started
+            if trace.span is not None:
+                trace.span.set_attribute("db.statements", trace.statements)
+                trace.span.end()
+            if settings.trace_enabled:
+                logger.info(
+                    "[%s] %s from user %s: %.1f ms, %d SQL statements in %.1f ms",
+                    trace.trace_id,
+                    update_type,
+                    trace.telegram_id,
+                    elapsed * 1000,
+                    trace.statements,
+                    trace.sql_time * 1000,
+                )
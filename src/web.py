@@ -0,0 +1,145 @@
+"""aiohttp web server: webhook endpoint and health checks."""
+
+import asyncio
+import logging
+import signal
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import TelegramMethod
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from src.config import settings
+from src.metrics import render_metrics
+
+logger = logging.getLogger(__name__)
+
+
+async def health(request: web.Request) -> web.Response:
+    """Liveness probe for load balancers and orchestrators."""
+    return web.json_response({"status": "ok"})
+
+
+async def metrics(request: web.Request) -> web.Response:
+    """Prometheus scrape endpoint."""
+    body, content_type = render_metrics()
+    return web.Response(body=body, headers={"Content-Type": content_type})
+
+
+def create_app() -> web.Application:
+    """Create the aiohttp application with service endpoints."""
+    app = web.Application()
+    app.router.add_get("/health", health)
+    if settings.metrics_enabled:
+        app.router.add_get("/metrics", metrics)
+    return app
+
+
+async def start_server(app: web.Application) -> web.AppRunner:
+    """Start serving an application in the background."""
+    runner = web.AppRunner(app, shutdown_timeout=settings.web_shutdown_timeout)
+    await runner.setup()
+    site = web.TCPSite(runner, host=settings.web_host, port=settings.web_port)
+    await site.start()
+    logger.info("Web server listening on %s:%d", settings.web_host, settings.web_port)
+    return runner
+
+
+async def serve(app: web.Application) -> None:
+    """Serve an application until SIGINT/SIGTERM, then shut down gracefully."""
+    runner = await start_server(app)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    try:
+        await stop.wait()
+    finally:
+        logger.info("Stopping web server...")
+        # Stops accepting connections and waits for in-flight requests
+        await runner.cleanup()
+
+
+class BackgroundRequestHandler(SimpleRequestHandler):
+    """
+    Webhook handler that acknowledges updates at once and handles them in tasks.
+
+    Answering before the handler runs keeps slow updates (exports, imports,
+    throttled sends) from outliving Telegram's webhook timeout, which would
+    make Telegram deliver them again, and from holding one of its few
+    concurrent webhook connections. On shutdown the running tasks are given
+    ``drain_timeout`` seconds to finish before the bot session is closed.
+    """
+
+    def __init__(self, *args: Any, drain_timeout: float, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.drain_timeout = drain_timeout
+        self.tasks: set[asyncio.Task[None]] = set()
+
+    def register(self, app: web.Application, /, path: str, **kwargs: Any) -> None:
+        # Drain before the base class closes the bot session on shutdown
+        app.on_shutdown.append(self._drain)
+        super().register(app, path=path, **kwargs)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        bot = await self.resolve_bot(request)
+        if not self.verify_secret(request.headers.get("X-Telegram-Bot-Api-Secret-Token", ""), bot):
+            return web.Response(body="Unauthorized", status=401)
+
+        update = await request.json(loads=bot.session.json_loads)
+        task = asyncio.create_task(self._process(bot, update))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    async def _process(self, bot: Bot, update: dict[str, Any]) -> None:
+        try:
+            result = await self.dispatcher.feed_raw_update(bot=bot, update=update, **self.data)
+            if isinstance(result, TelegramMethod):
+                await self.dispatcher.silent_call_request(bot=bot, result=result)
+        except Exception:
+            # Already acknowledged, so Telegram will not redeliver it
+            logger.exception("Failed to process update %s", update.get("update_id"))
+
+    async def _drain(self, app: web.Application) -> None:
+        if not self.tasks:
+            return
+        logger.info("Waiting for %d updates in progress...", len(self.tasks))
+        _, pending = await asyncio.wait(self.tasks, timeout=self.drain_timeout)
+        if pending:
+            logger.warning("Cancelling %d updates still running at shutdown", len(pending))
+            for task in pending:
+                task.cancel()
+            await asyncio.wait(pending)
+
+
+async def run_webhook(bot: Bot, dp: Dispatcher) -> None:
+    """Receive updates through a Telegram webhook instead of long polling."""
+    if not settings.webhook_base_url or not settings.webhook_secret:
+        raise ValueError("WEBHOOK_BASE_URL and WEBHOOK_SECRET are required in webhook mode")
+
+    async def on_startup(bot: Bot) -> None:
+        # Every replica registers the same URL, so this is idempotent
+        await bot.set_webhook(
+            url=f"{settings.webhook_base_url.rstrip('/')}{settings.webhook_path}",
+            secret_token=settings.webhook_secret,
+            allowed_updates=dp.resolve_used_update_types(),
+            max_connections=settings.webhook_max_connections,
+        )
+        logger.info("Webhook registered")
+
+    dp.startup.register(on_startup)
+
+    app = create_app()
+    BackgroundRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=settings.webhook_secret,
+        drain_timeout=settings.web_shutdown_timeout,
+    ).register(app, path=settings.webhook_path)
+    setup_application(app, dp, bot=bot)
+
+    await serve(app)
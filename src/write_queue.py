@@ -0,0 +1,220 @@
+"""Write-behind queue that coalesces concurrent new-dream inserts."""
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date
+
+from sqlalchemy import Integer, bindparam, insert, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import settings
+from src.database import async_session
+from src.models import Dream
+from src.repository import create_dream
+from src.tags import parse_tags, set_dream_tags
+
+logger = logging.getLogger(__name__)
+
+_INSERT_DREAMS = insert(Dream.__table__).returning(
+    Dream.__table__.c.id,
+    # Rows come back in the order of the parameter sets
+    sort_by_parameter_order=True,
+)
+
+# Rows are locked in ID order first, so flushes in other processes that
+# touch the same users cannot deadlock on them
+_BUMP_DREAM_COUNTS = text(
+    """
+    WITH locked AS (
+        SELECT id FROM users WHERE id = ANY(:user_ids)
+        ORDER BY id
+        FOR NO KEY UPDATE
+    )
+    UPDATE users SET dream_count = users.dream_count + c.n
+    FROM unnest(:user_ids, :counts) AS c(user_id, n)
+    WHERE users.id = c.user_id AND users.id IN (SELECT id FROM locked)
+    """
+).bindparams(
+    bindparam("user_ids", type_=ARRAY(Integer)),
+    bindparam("counts", type_=ARRAY(Integer)),
+)
+
+
+@dataclass(slots=True)
+class PendingDream:
+    """A new dream waiting for its batch to be committed."""
+
+    values: dict
+    future: asyncio.Future[int] = field(
+        default_factory=lambda: asyncio.get_running_loop().create_future()
+    )
+
+
+class DreamWriteQueue:
+    """
+    Coalesce concurrent new-dream inserts into multi-row batches.
+
+    A batch is flushed when it reaches ``batch_size`` dreams or ``batch_delay``
+    seconds after its first dream arrived, in a single transaction. Submitters
+    get their dream ID only after that transaction commits, and wait for a
+    free slot when ``max_pending`` dreams are already queued.
+    """
+
+    def __init__(self, batch_size: int, batch_delay: float, max_pending: int) -> None:
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self._queue: asyncio.Queue[PendingDream] = asyncio.Queue(maxsize=max_pending)
+        self._worker: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None
+
+    @property
+    def pending(self) -> int:
+        """Number of dreams waiting in the queue."""
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        """Start the flushing worker."""
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run(), name="dream-write-queue")
+
+    async def stop(self) -> None:
+        """Flush everything already queued and stop the worker."""
+        if self._worker is None:
+            return
+        await self._queue.join()
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    async def submit(
+        self,
+        user_id: int,
+        title: str,
+        description: str,
+        tags: str,
+        notes: str,
+        dream_date: date,
+    ) -> int:
+        """
+        Save a new dream and return its ID once it is committed.
+
+        Without a running worker (scripts, tests) the dream is written directly.
+        """
+        values = {
+            "user_id": user_id,
+            "title": title,
+            "description": description,
+            "tags": tags,
+            "notes": notes,
+            "dream_date": dream_date,
+        }
+        if self._worker is None:
+            async with async_session() as session:
+                dream_id = await create_dream(session, **values)
+                await session.commit()
+            return dream_id
+
+        pending = PendingDream(values)
+        await self._queue.put(pending)
+        # Shielded: a cancelled handler must not cancel a write that may commit
+        return await asyncio.shield(pending.future)
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.batch_delay
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _flush(self, batch: list[PendingDream]) -> None:
+        dream_ids: list[int] | None = None
+        try:
+            async with async_session() as session:
+                try:
+                    dream_ids = await self._insert_batch(session, batch)
+                except Exception:
+                    logger.exception(
+                        "Batch insert of %d dreams failed, retrying one by one", len(batch)
+                    )
+                else:
+                    await session.commit()
+        except Exception as exc:
+            # The COMMIT may have reached the server before the connection
+            # dropped, so retrying could save the whole batch twice
+            logger.exception("Commit of %d dreams failed", len(batch))
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(exc)
+            return
+
+        if dream_ids is None:
+            await self._flush_one_by_one(batch)
+            return
+
+        for pending, dream_id in zip(batch, dream_ids):
+            if not pending.future.done():
+                pending.future.set_result(dream_id)
+
+    async def _insert_batch(self, session: AsyncSession, batch: list[PendingDream]) -> list[int]:
+        result = await session.execute(_INSERT_DREAMS, [pending.values for pending in batch])
+        dream_ids = list(result.scalars().all())
+
+        per_user: dict[int, int] = defaultdict(int)
+        user_tags: dict[int, dict[int, list[str]]] = defaultdict(dict)
+        for pending, dream_id in zip(batch, dream_ids):
+            user_id = pending.values["user_id"]
+            per_user[user_id] += 1
+            names = parse_tags(pending.values["tags"])
+            if names:
+                user_tags[user_id][dream_id] = names
+
+        await session.execute(
+            _BUMP_DREAM_COUNTS,
+            {"user_ids": list(per_user), "counts": list(per_user.values())},
+        )
+        for user_id, dream_tags in user_tags.items():
+            await set_dream_tags(session, user_id, dream_tags, replace=False)
+        return dream_ids
+
+    async def _flush_one_by_one(self, batch: list[PendingDream]) -> None:
+        # Isolates the dream that broke the batch; everyone else still gets saved
+        for pending in batch:
+            try:
+                async with async_session() as session:
+                    dream_id = await create_dream(session, **pending.values)
+                    await session.commit()
+            except Exception as exc:
+                if not pending.future.done():
+                    pending.future.set_exception(exc)
+            else:
+                if not pending.future.done():
+                    pending.future.set_result(dream_id)
+
+
+dream_writer = DreamWriteQueue(
+    batch_size=settings.dream_write_batch_size,
+    batch_delay=settings.dream_write_batch_delay_ms / 1000,
+    max_pending=settings.dream_write_queue_size,
+)
@@ -0,0 +1,36 @@
+"""Memory use of the streaming export."""
+
+import tracemalloc
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.exporters import EXPORT_WRITERS, export_dreams
+
+DREAMS = 100_000
+
+# Streaming peaks at ~2 MiB here; loading the whole diary takes ~170 MiB
+PEAK_LIMIT = 16 * 1024 * 1024
+
+
+@pytest.mark.parametrize("format_name", ["txt", "jsonl"])
+def test_export_memory_is_bounded(run, engine, make_diary, tmp_path, format_name):
+    user_id = make_diary(DREAMS)
+    path = tmp_path / f"export.{format_name}"
+
+    async def export() -> int:
+        async with AsyncSession(engine) as session:
+            with open(path, "w", encoding="utf-8") as file:
+                writer = EXPORT_WRITERS[format_name](file)
+                return await export_dreams(session, writer, user_id, DREAMS)
+
+    tracemalloc.start()
+    try:
+        count = run(export())
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert count == DREAMS
+    size = path.stat().st_size
+    assert peak < PEAK_LIMIT, f"peak {peak / 2**20:.1f} MiB for a {size / 2**20:.1f} MiB export"
@@ -0,0 +1,69 @@
+"""Identity lookup middleware and its use of the update's session."""
+
+import pytest
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import User as TelegramUser
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.middlewares import session as session_middlewares
+from src.middlewares.identity import IdentityMiddleware, identity_cache
+from src.middlewares.session import ReadReplicaMiddleware
+
+# Far below the IDs the benchmarks and fixtures register (the round-trip
+# benchmark uses -1), so this user never exists
+UNKNOWN_TELEGRAM_ID = -(2**62)
+
+
+@pytest.fixture
+def from_user():
+    identity_cache.invalidate(UNKNOWN_TELEGRAM_ID)
+    return TelegramUser(id=UNKNOWN_TELEGRAM_ID, is_bot=False, first_name="Test")
+
+
+def test_cache_miss_shares_update_transaction(run, engine, from_user):
+    seen = {}
+
+    async def handler(event, data):
+        seen["user_id"], seen["lang"] = data["user_id"], data["lang"]
+        # Still the lookup's transaction: one checkout for the whole update
+        seen["in_transaction"] = data["session"].in_transaction()
+
+    async def scenario():
+        async with AsyncSession(engine) as session:
+            data = {"session": session, "event_from_user": from_user}
+            await IdentityMiddleware()(handler, None, data)
+
+    run(scenario())
+
+    assert identity_cache.misses
+    assert seen == {"user_id": None, "lang": "en", "in_transaction": True}
+
+
+def test_replica_handler_releases_primary(run, engine, from_user, monkeypatch):
+    async def replica_session_maker(telegram_id):
+        return async_sessionmaker(engine, class_=AsyncSession)
+
+    monkeypatch.setattr(session_middlewares, "get_read_session_maker", replica_session_maker)
+    seen = {}
+
+    async def handler(event, data):
+        primary = seen.pop("primary")
+        seen["replica"] = data["session"] is not primary
+        seen["primary_in_transaction"] = primary.in_transaction()
+
+    async def with_replica(event, data):
+        return await ReadReplicaMiddleware()(handler, event, data)
+
+    async def scenario():
+        async with AsyncSession(engine) as primary:
+            seen["primary"] = primary
+            data = {
+                "session": primary,
+                "event_from_user": from_user,
+                "handler": HandlerObject(callback=handler, flags={"read_only": True}),
+            }
+            await IdentityMiddleware()(with_replica, None, data)
+
+    run(scenario())
+
+    assert seen == {"replica": True, "primary_in_transaction": False}
@@ -0,0 +1,127 @@
+"""Outgoing message throttling on a virtual clock."""
+
+import asyncio
+import heapq
+import itertools
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from src.outgoing import SendThrottler, bulk_sends
+
+
+class FakeClock:
+    """Virtual time: sleepers wake in order once everything else has settled."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self._sleepers: list[tuple[float, int, asyncio.Future[None]]] = []
+        self._order = itertools.count()
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float) -> None:
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._sleepers, (self.now + max(delay, 0.0), next(self._order), future))
+        await future
+
+    async def run(self, *coros):
+        """Run coroutines to completion, advancing time whenever all of them wait."""
+        tasks = [asyncio.ensure_future(coro) for coro in coros]
+        while not all(task.done() for task in tasks):
+            for _ in range(20):
+                await asyncio.sleep(0)
+            if self._sleepers and not all(task.done() for task in tasks):
+                wake_at, _, future = heapq.heappop(self._sleepers)
+                self.now = max(self.now, wake_at)
+                if not future.done():
+                    future.set_result(None)
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def make_throttler(clock, **overrides):
+    options = {"global_rate": 30.0, "chat_rate": 1.0, "chat_burst": 1, "retry_attempts": 0}
+    options.update(overrides)
+    return SendThrottler(**options, clock=clock, sleep=clock.sleep)
+
+
+def send(chat_id, text="hi"):
+    return SendMessage(chat_id=chat_id, text=text)
+
+
+def test_interactive_sends_go_before_bulk(run, clock):
+    throttler = make_throttler(clock, global_rate=1.0, chat_burst=10)
+    sent = []
+
+    async def make_request(bot, method):
+        sent.append(method.text)
+
+    async def scenario():
+        await throttler(make_request, None, send(1, "first"))
+        with bulk_sends():
+            bulk = throttler(make_request, None, send(2, "bulk"))
+            bulk_task = asyncio.ensure_future(bulk)
+        interactive = throttler(make_request, None, send(3, "interactive"))
+        return await clock.run(bulk_task, interactive)
+
+    run(scenario())
+
+    assert sent == ["first", "interactive", "bulk"]
+
+
+def test_messages_to_one_chat_are_spaced(run, clock):
+    throttler = make_throttler(clock, chat_rate=1.0, chat_burst=1)
+    sent_at = []
+
+    async def make_request(bot, method):
+        sent_at.append(clock.now)
+
+    run(clock.run(*(throttler(make_request, None, send(1)) for _ in range(3))))
+
+    assert sent_at == [0.0, 1.0, 2.0]
+
+
+def test_cancelled_send_refunds_chat_slot(run, clock):
+    throttler = make_throttler(clock, global_rate=1.0, chat_burst=1)
+
+    async def make_request(bot, method):
+        pass
+
+    async def scenario():
+        # Takes the only global token, so the next send waits for one
+        await throttler(make_request, None, send(1))
+        waiting = asyncio.ensure_future(throttler(make_request, None, send(2)))
+        for _ in range(5):
+            await asyncio.sleep(0)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+    run(scenario())
+
+    # Chat 2 never got a message, so its burst is intact
+    assert throttler.chats.reserve(2) == 0.0
+
+
+def test_retry_after_is_retried_up_to_the_limit(run, clock):
+    throttler = make_throttler(clock, chat_burst=10, retry_attempts=2)
+    calls = []
+
+    async def make_request(bot, method):
+        calls.append(clock.now)
+        raise TelegramRetryAfter(method=method, message="Too Many Requests", retry_after=5)
+
+    [result] = run(clock.run(throttler(make_request, None, send(1))))
+
+    assert isinstance(result, TelegramRetryAfter)
+    assert len(calls) == 3
+    assert throttler.retries == 2
+    # Each retry waited for the chat pause Telegram asked for
+    assert all(later - earlier >= 5 for earlier, later in itertools.pairwise(calls))
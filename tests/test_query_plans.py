@@ -0,0 +1,66 @@
+"""Query-plan regression tests for the (user_id, dream_date, id) index."""
+
+import io
+from collections.abc import Awaitable, Callable
+from datetime import date
+from typing import Any
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from src.config import settings
+from src.exporters import JsonLinesWriter, export_dreams
+from src.handlers.dreams import fetch_dreams_page
+from src.handlers.search import search_ranked
+
+INDEX = "ix_dreams_user_id_dream_date_id"
+
+Query = Callable[[AsyncSession, int], Awaitable[Any]]
+
+QUERIES: dict[str, Query] = {
+    "list.first_page": lambda s, user_id: fetch_dreams_page(
+        s, user_id, None, settings.dreams_per_page
+    ),
+    "list.next_page": lambda s, user_id: fetch_dreams_page(
+        s, user_id, ("n", date.today(), 2**31 - 1), settings.dreams_per_page
+    ),
+    "export": lambda s, user_id: export_dreams(s, JsonLinesWriter(io.StringIO()), user_id, 0),
+    "search.ranked": lambda s, user_id: search_ranked(s, user_id, "forest", "en"),
+}
+
+
+async def explain(engine: AsyncEngine, query: Query, user_id: int) -> list[str]:
+    """Run a query, then EXPLAIN every statement it sent."""
+    statements: list[tuple[str, Any]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany) -> None:
+        statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        async with AsyncSession(engine) as session:
+            await query(session, user_id)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+    plans = []
+    async with engine.connect() as conn:
+        # A small test table is cheaper to scan whole; ask for the plan
+        # the planner uses once the table outgrows a few pages
+        await conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        for statement, parameters in statements:
+            result = await conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+            plans.append("\n".join(row[0] for row in result))
+        await conn.rollback()
+    return plans
+
+
+@pytest.mark.parametrize("name", QUERIES)
+def test_query_uses_user_date_index(run, engine, make_diary, name):
+    user_id = make_diary(200)
+
+    plans = run(explain(engine, QUERIES[name], user_id))
+
+    assert plans, f"{name} sent no SQL"
+    assert any(INDEX in plan for plan in plans), "\n\n".join(plans)
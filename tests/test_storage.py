@@ -0,0 +1,104 @@
+"""FSM storage backends."""
+
+import asyncio
+import os
+import uuid
+
+import pytest
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import BaseStorage, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from src.storage import PostgresStorage
+
+REDIS_URL = os.environ.get("REDIS_URL", "")
+
+TTL = 1
+
+
+class Form(StatesGroup):
+    title = State()
+
+
+@pytest.fixture(params=["memory", "postgres", "redis"])
+def storage(request, run):
+    if request.param == "memory":
+        backend: BaseStorage = MemoryStorage()
+    elif request.param == "postgres":
+        backend = PostgresStorage(request.getfixturevalue("engine"), TTL)
+    else:
+        if not REDIS_URL:
+            pytest.skip("REDIS_URL is not set")
+        from aiogram.fsm.storage.redis import RedisStorage
+
+        backend = RedisStorage.from_url(REDIS_URL, state_ttl=TTL, data_ttl=TTL)
+    yield backend
+    run(backend.close())
+
+
+@pytest.fixture
+def key():
+    # Unique per test so runs against a shared database do not interfere
+    return StorageKey(bot_id=1, chat_id=uuid.uuid4().int % 2**31, user_id=42)
+
+
+def test_state_and_data_round_trip(run, storage, key):
+    async def scenario():
+        assert await storage.get_state(key) is None
+        assert await storage.get_data(key) == {}
+
+        await storage.set_state(key, Form.title)
+        await storage.set_data(key, {"title": "Flying"})
+        assert await storage.get_state(key) == Form.title.state
+        assert await storage.get_data(key) == {"title": "Flying"}
+
+        await storage.set_state(key, None)
+        await storage.set_data(key, {})
+        assert await storage.get_state(key) is None
+        assert await storage.get_data(key) == {}
+
+    run(scenario())
+
+
+def test_update_data_merges(run, storage, key):
+    async def scenario():
+        await storage.set_data(key, {"title": "Flying", "tags": "sky"})
+        merged = await storage.update_data(key, {"tags": "sea", "notes": "calm"})
+        assert merged == {"title": "Flying", "tags": "sea", "notes": "calm"}
+        assert await storage.get_data(key) == merged
+
+        other = StorageKey(bot_id=1, chat_id=key.chat_id + 1, user_id=42)
+        assert await storage.update_data(other, {"title": "New"}) == {"title": "New"}
+
+    run(scenario())
+
+
+def test_abandoned_flow_expires(run, storage, key):
+    if isinstance(storage, MemoryStorage):
+        pytest.skip("memory storage has no TTL")
+
+    async def scenario():
+        await storage.set_state(key, Form.title)
+        await storage.set_data(key, {"title": "Flying"})
+        await asyncio.sleep(TTL + 0.5)
+        assert await storage.get_state(key) is None
+        assert await storage.get_data(key) == {}
+
+        # Writing one part of an expired flow does not bring back the other
+        await storage.update_data(key, {"notes": "calm"})
+        assert await storage.get_state(key) is None
+        assert await storage.get_data(key) == {"notes": "calm"}
+
+    run(scenario())
+
+
+def test_postgres_purges_expired_rows(run, engine, key):
+    storage = PostgresStorage(engine, TTL)
+
+    async def scenario():
+        await storage.set_state(key, Form.title)
+        await asyncio.sleep(TTL + 0.5)
+        assert await storage.purge_expired() >= 1
+        await storage.close()
+
+    run(scenario())